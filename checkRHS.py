@@ -16,6 +16,14 @@ import pandas as pd
 import numpy as np
 import nga # Custom module for NGA and other resources
 
+# Regular expressions for extracting the components of a plant name
+_GENUS_REGEX = re.compile(r'^\w{1,5}\.', flags=re.IGNORECASE)
+_PLOIDY_REGEX = re.compile(r'\(.*\dn\)', flags=re.IGNORECASE)
+_NUMBERED_SELECTION_REGEX = re.compile(r' #\d+?', flags=re.IGNORECASE)
+_NAMED_SELECTION_REGEX = re.compile(r' \'.+\'$', flags=re.IGNORECASE)
+_FORM_REGEX = re.compile(r' f. \w+', flags=re.IGNORECASE)
+_CROSS_REGEX = re.compile(r' x ', flags=re.IGNORECASE)
+
 
 def initParser():
 	'''Set up CLI.'''
@@ -49,37 +57,37 @@ def extractName(rhs_obj, plant):
 	else:
 		# Extract genus
 		genus = ''
-		matches = re.search(r'^\w{1,5}\.', plant, flags=re.IGNORECASE)
+		matches = _GENUS_REGEX.search(plant)
 		if matches is not None:
 			genus = matches.group()
 			plant = plant[len(genus):].strip()
 
 		# Remove any ploidy references
-		matches = re.search(r'\(.*\dn\)', plant, flags=re.IGNORECASE)
+		matches = _PLOIDY_REGEX.search(plant)
 		if matches is not None:
 			ploidy = matches.group()
 			plant = plant.replace(ploidy, '').replace('  ',' ').strip()
 
 		# Remove numbered selections
-		matches = re.search(r' #\d+?', plant, flags=re.IGNORECASE)
+		matches = _NUMBERED_SELECTION_REGEX.search(plant)
 		if matches is not None:
 			selection = matches.group()
 			plant = plant.replace(selection, '').replace('  ',' ').strip()
 
 		# Remove named selections
-		matches = re.search(r' \'.+\'$', plant, flags=re.IGNORECASE)
+		matches = _NAMED_SELECTION_REGEX.search(plant)
 		if matches is not None:
 			selection = matches.group()
 			plant = plant.replace(selection, '').replace('  ',' ').strip()
 
 		# Remove forms
-		matches = re.search(r' f. \w+', plant, flags=re.IGNORECASE)
+		matches = _FORM_REGEX.search(plant)
 		if matches is not None:
 			selection = matches.group()
 			plant = plant.replace(selection, '').replace('  ',' ').strip()
 
 		# Check if this plant is also an unnamed cross
-		matches = re.findall(r' x ', plant, flags=re.IGNORECASE)
+		matches = _CROSS_REGEX.findall(plant)
 		if matches is not None and len(matches) > 0:
 			if len(matches) > 1:
 				print("WARNING: Hybrid parent detected")
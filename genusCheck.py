@@ -181,12 +181,13 @@ def checkBotanicalEntries(genus, dca_db, nga_dataset, entries, nga_db=None, orch
 	# Iterate through the botanical names from the NGA database
 	num_names = len(entries)
 	iteration = 0
+	last_update = 0.0
 
 	nga.core.stdoutWF('\rChecking NGA botanical entries...', 1, verbosity)
 	for botanical_name in entries:
 		iteration += 1
 		percentage = 100.0*(iteration/num_names)
-		nga.core.stdoutWF(f'\rChecking NGA botanical entries... {percentage:00.1f}%', 2, verbosity)
+		last_update = nga.core.stdoutProgress('\rChecking NGA botanical entries... {:00.1f}%', last_update, 2, verbosity, (percentage,))
 
 		# Hybrid flags
 		nga_hyb = False
@@ -531,11 +532,12 @@ def checkBotanicalEntries(genus, dca_db, nga_dataset, entries, nga_db=None, orch
 		progress = 0.0
 		taxa = len(rows)
 		nga_dataset_additions = []
+		last_update = 0.0
 
 		nga.core.stdoutWF('\rChecking COL records...', 1, verbosity)
 		for row in rows:
 			progress += 1.0
-			nga.core.stdoutWF(f'\rChecking COL records... {(100.0*progress/taxa):00.1f}%', 2, verbosity)
+			last_update = nga.core.stdoutProgress('\rChecking COL records... {:00.1f}%', last_update, 2, verbosity, (100.0*progress/taxa,))
 
 			entry = row[0].strip() # Full botanical name
 			entry_final = entry # Version of name to be added to list
@@ -655,6 +657,7 @@ def checkRegisteredOrchids(genera, nga_dataset, nga_db, parentage_check=False):
 			hybrid_names.remove('')
 		hybrid_count = len(hybrid_names)
 		iteration = 0
+		last_update = 0.0
 
 		sys.stdout.write(f'\rChecking hybrids in genus {genus}...')
 		sys.stdout.flush()
@@ -662,8 +665,7 @@ def checkRegisteredOrchids(genera, nga_dataset, nga_db, parentage_check=False):
 		# Check each hybrid in this genus
 		for hybrid in hybrid_names:
 			iteration +=1
-			sys.stdout.write(f'\rChecking hybrids in genus {genus}... {iteration}/{hybrid_count}')
-			sys.stdout.flush()
+			last_update = nga.core.stdoutProgress('\rChecking hybrids in genus {}... {}/{}', last_update, args=(genus, iteration, hybrid_count))
 			quotes = hybrid.count("'") # Get the number of quotes in the name
 			hybrids[hybrid]['has_quotes'] = False
 
@@ -7,28 +7,41 @@ This script is designed for Python 3 and Beautiful Soup 4 with the lxml parser."
 # Module imports
 import os
 import csv
-import json
 import getpass
 import shutil
 import sqlite3
+import subprocess
 import zipfile
 from sys import stdout
 from datetime import datetime, timedelta
 from time import sleep
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 from . import core
 
 script_path = os.path.dirname(__file__)
 
+# Prefix for the tables created by the sqlite3 shell import
+_STAGING_PREFIX = 'staging_'
+
 
 class GBIF:
 	"""GBIF class for handling authentication."""
 
+	# Parsed credentials shared by all instances, keyed by (path, modification time)
+	_auth_cache = {}
+
 	def __init__(self, gbif_path=None):
 		"""Create an instance and set up a requests session to the COL API."""
 
 		self._session = requests.Session()
+		self._session.headers.update({'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING}) # JSON API responses compress well (Brotli is included if installed)
+
+		# Retry failed connections and server errors on GET requests, allowing time for the API to recover
+		retries = Retry(total=3, backoff_factor=2, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+		self._session.mount('https://', HTTPAdapter(max_retries=retries))
 
 		# Set the path to the GBIF auth file
 		if gbif_path is not None:
@@ -46,6 +59,12 @@ class GBIF:
 		if not os.path.exists(auth_file):
 			_createAuthFile(auth_file)
 
+		# Reuse the credentials if this file has already been read and hasn't changed since
+		cache_key = (auth_file, os.path.getmtime(auth_file))
+		if cache_key in GBIF._auth_cache:
+			self._auth = GBIF._auth_cache[cache_key]
+			return
+
 		with open(auth_file, 'r', encoding='utf-8') as gbif:
 			gbif_auth = gbif.read()
 
@@ -54,6 +73,7 @@ class GBIF:
 			username = gbif_account[0]
 			password = gbif_account[1]
 			self._auth = HTTPBasicAuth(username, password) # GBIF account
+			GBIF._auth_cache[cache_key] = self._auth
 		else:
 			raise AttributeError("Failed to load the GBIF credentials.")
 
@@ -82,7 +102,7 @@ class COL(GBIF):
 		except requests.exceptions.RequestException:
 			return [None, 'Error retrieving taxon']
 
-		rdata = req.json()
+		rdata = core.jsonLoads(req.content)
 		#print(json.dumps(rdata, indent=4, sort_keys=True))
 
 		if rdata['empty']:
@@ -125,7 +145,7 @@ class COL(GBIF):
 				return [None, 'Unable to retrieve synonyms from COL']
 
 			synonyms = []
-			rdata = req.json()
+			rdata = core.jsonLoads(req.content)
 			#print(json.dumps(rdata, indent=4, sort_keys=True))
 
 			# Check if there are any synonyms
@@ -237,7 +257,7 @@ class DCA(GBIF):
 		except requests.exceptions.RequestException:
 			return (None, 'Unable to retrieve taxon ID.')
 
-		rdata = req.json()
+		rdata = core.jsonLoads(req.content)
 		taxon_id = None
 
 		if 'total' in rdata and rdata['total'] == 0:
@@ -267,47 +287,40 @@ class DCA(GBIF):
 
 		# Post to the asynchronous API (this requests a build of an export)
 		try:
-			req = self._session.post(self._export_request_url % dataset_key, auth=self._auth, data=json.dumps(data), headers={"Content-Type": "application/json"})
+			req = self._session.post(self._export_request_url % dataset_key, auth=self._auth, data=core.jsonDumpsBytes(data), headers={"Content-Type": "application/json"})
 		except requests.exceptions.RequestException:
 			return (None, 'Unable to request build of the Darwin Core Archive.')
 
 		# This should return the export key that can be used to fetch the ZIP file
-		rdata = req.json()
+		rdata = core.jsonLoads(req.content)
 
 		# Check the status of the export
 		finished = False
 		delay = 15
-		ecount = 0
 		while not finished:
 			try:
-				# Get the status of the export
+				# Get the status of the export (failed requests are retried by the session adapter)
 				req = self._session.get(self._export_retrieve_url % rdata, auth=self._auth, headers={"Accept": "application/json"})
 			except requests.exceptions.RequestException as err:
-				stdout.write('e')
-				stdout.flush()
-				if ecount < 3:
-					ecount += 1
-					sleep(30)
-				else:
-					return (None, str(err))
+				return (None, str(err))
+
+			if req.status_code != 200:
+				# Something went wrong with the request
+				return (None, f'HTTP Error {req.status_code} was returned when attempting to fetch the Darwin Core Archive.')
+
+			# Extract the status field; valid responses are:
+			# waiting, blocked, running, finished, canceled, failed
+			qdata = core.jsonLoads(req.content)
+			status = qdata['status'].lower().strip()
+			if status in ('canceled','failed'):
+				return (None, f'Export job {status}.')
+
+			if 'finished' in status:
+				finished = True
 			else:
-				if req.status_code != 200:
-					# Something went wrong with the request
-					return (None, f'HTTP Error {req.status_code} was returned when attempting to fetch the Darwin Core Archive.')
-
-				# Extract the status field; valid responses are:
-				# waiting, blocked, running, finished, canceled, failed
-				qdata = req.json()
-				status = qdata['status'].lower().strip()
-				if status in ('canceled','failed'):
-					return (None, f'Export job {status}.')
-
-				if 'finished' in status:
-					finished = True
-				else:
-					sleep(delay)
-					stdout.write('.')
-					stdout.flush()
+				sleep(delay)
+				stdout.write('.')
+				stdout.flush()
 
 		# Fetch the export
 		try:
@@ -325,11 +338,12 @@ class DCA(GBIF):
 
 		# If the zip file successfully downloaded and is a valid zipfile, extract it
 		if os.path.exists(zpath):
-			if zipfile.is_zipfile(zpath):
-				with zipfile.ZipFile(zpath) as zfile:
+			# Let ZipFile validate the archive so the central directory is only read once
+			try:
+				with zipfile.ZipFile(zpath, allowZip64=True) as zfile:
 					gpath = os.path.join(self.__cache, genus) # Create a subfolder in the cache directory using the genus name
 					zfile.extractall(gpath) # Extract the zip file into the new subfolder
-			else:
+			except zipfile.BadZipFile:
 				errmsg = "The downloaded Darwin Core Archive export was not a valid zip file."
 				gpath = None
 				keep_zip = False
@@ -384,14 +398,17 @@ class DCA(GBIF):
 					('VernacularName.tsv','VernacularName'),
 				]
 
-				# Prepare the commands
+				# Prepare the commands for the sqlite3 shell
+				# Each file is imported into its own staging table (named from the header row)
+				# and ascii mode is used so that quotes are not interpreted, matching csv.QUOTE_NONE
 				commands = [
-					f'.read {script_path}/create-DCA-tables.sql',
-					'.mode tabs',
+					'.bail on',
+					'.mode ascii',
+					'.separator "\\t" "\\n"',
 				]
 
 				for table in tables:
-					commands.append(f'.import "{genus}/{table[0]}" {table[1]}')
+					commands.append(f'.import "{genus}/{table[0]}" {_STAGING_PREFIX}{table[1]}')
 
 				stdout.write(' done.\r\nBuilding database... ')
 				stdout.flush()
@@ -412,30 +429,36 @@ class DCA(GBIF):
 				with open(os.path.join(script_path,'create-DCA-tables.sql'), 'r', encoding='utf-8') as file_desc:
 					contents = file_desc.read()
 
+				# Create all the tables in a single transaction
 				queries = contents.split(';')
-				for query in queries:
-					cur.execute(query)
-					conn.commit()
+				with conn:
+					for query in queries:
+						if query.strip():
+							cur.execute(query)
 
-				# Import files
-				for table in tables:
-					tname = os.path.join(gpath, table[0])
-					with open(tname, 'r', encoding='utf-8-sig') as file_desc:
-						reader = csv.reader(file_desc, dialect=csv.excel_tab, quoting=csv.QUOTE_NONE)
+				# Import files, preferring the sqlite3 shell as it parses the TSV files natively
+				imported = False
+				if shutil.which('sqlite3') is not None:
+					imported = _importWithShell(conn, fpath, sqlcat, self.__cache, tables)
+
+				if not imported:
+					for table in tables:
+						tname = os.path.join(gpath, table[0])
+						with open(tname, 'r', encoding='utf-8-sig') as file_desc:
+							reader = csv.reader(file_desc, dialect=csv.excel_tab, quoting=csv.QUOTE_NONE)
 
-						# Get the column names from the header row
-						columns = next(reader)
-						columns = [h.strip().split(':')[-1] for h in columns]
+							# Get the column names from the header row
+							columns = next(reader)
+							columns = [h.strip().split(':')[-1] for h in columns]
 
-						# Must quote column names, since keywords 'order' and 'references' are used
-						query = f'INSERT INTO {table[1]}({{0}}) VALUES ({{1}})'
-						query = query.format(','.join([f'"{col}"' for col in columns]), ','.join('?' * len(columns)))
+							# Must quote column names, since keywords 'order' and 'references' are used
+							query = f'INSERT INTO {table[1]}({{0}}) VALUES ({{1}})'
+							query = query.format(','.join([f'"{col}"' for col in columns]), ','.join('?' * len(columns)))
 
-						# Import each row
-						for row in reader:
-							cur.execute(query, row)
+							# Import all the rows using a single prepared statement
+							cur.executemany(query, reader)
 
-					conn.commit()
+						conn.commit()
 
 				# Save and close the connection
 				conn.close()
@@ -466,6 +489,48 @@ class DCA(GBIF):
 		return None
 
 
+def _importWithShell(conn, fpath, sqlcat, cwd, tables):
+	"""Import the DCA files using the sqlite3 command-line shell, then copy the
+	staging tables into the DCA tables by column name. Returns True on success."""
+
+	# Run the import script
+	with open(sqlcat, 'r', encoding='utf-8') as file_desc:
+		script = file_desc.read()
+
+	try:
+		subprocess.run(['sqlite3', fpath], input=script, cwd=cwd, text=True, check=True, capture_output=True)
+	except (OSError, subprocess.CalledProcessError):
+		success = False
+	else:
+		success = True
+
+	with conn:
+		for table in tables:
+			staging = f'{_STAGING_PREFIX}{table[1]}'
+
+			if success:
+				# The staging columns are named after the header row (e.g. dwc:taxonID)
+				staged = [row[1] for row in conn.execute(f'PRAGMA table_info("{staging}")')]
+				if len(staged) > 0:
+					columns = [col.strip().lstrip('\ufeff').split(':')[-1] for col in staged]
+
+					# Must quote column names, since keywords 'order' and 'references' are used
+					query = 'INSERT INTO {0}({1}) SELECT {2} FROM "{3}"'
+					query = query.format(table[1], ','.join([f'"{col}"' for col in columns]), ','.join([f'"{col}"' for col in staged]), staging)
+					conn.execute(query)
+				else:
+					success = False
+
+			conn.execute(f'DROP TABLE IF EXISTS "{staging}"')
+
+		# Don't leave a partial import behind if the Python fallback is needed
+		if not success:
+			for table in tables:
+				conn.execute(f'DELETE FROM {table[1]}')
+
+	return success
+
+
 def _createAuthFile(auth_file):
 	"""Store a set of authentication parameters."""
 
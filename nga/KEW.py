@@ -10,6 +10,12 @@ from urllib.parse import urljoin
 import requests
 from bs4 import BeautifulSoup
 
+# Regular expressions used to locate the fields of an entry
+_ACCEPTED_REGEX = re.compile('This name is accepted')
+_UNPLACED_REGEX = re.compile('This name is unplaced')
+_DISTRIBUTION_REGEX = re.compile('Distribution:')
+_FORMULA_REGEX = re.compile('Hybrid Formula:')
+
 
 class WCSP:
 	"""Create a user-friendly API for the KEW World Checklist of Selected Plants website."""
@@ -22,13 +28,32 @@ class WCSP:
 		self._hybrid_symbol = '×'
 
 		self._session = requests.Session()
+		self._session.headers.update({'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING}) # WCSP pages are large and compress well (Brotli is included if installed)
 		self._session.get(self._home_url)
 
+		# Successful search results, keyed by the name searched for
+		self._name_cache = {}
+
 
 	def nameSearch(self, synonym):
 		"""Search the WCSP for a given name and return the current accepted name.
 		Will return a dict with name and status to indicate if a name is unplaced."""
 
+		if synonym in self._name_cache:
+			return dict(self._name_cache[synonym])
+
+		result = self._nameSearch(synonym)
+
+		# Only cache names with a known status so that transient failures are retried
+		if result['status'] is not None:
+			self._name_cache[synonym] = dict(result)
+
+		return result
+
+
+	def _nameSearch(self, synonym):
+		"""Query the WCSP website for a given name (uncached)."""
+
 		def parseItalics(italics, link):
 			"""Method to parse the italics in the name."""
 
@@ -63,10 +88,10 @@ class WCSP:
 		def checkStatus(genus, soup, result):
 			"""Method to check the status of an entry."""
 
-			is_accepted = soup.find('p', string=re.compile('This name is accepted'))
-			is_unplaced = soup.find('p', string=re.compile('This name is unplaced'))
-			distribution = soup.find('th', string=re.compile('Distribution:'))
-			formula = soup.find('th', string=re.compile('Hybrid Formula:'))
+			is_accepted = soup.find('p', string=_ACCEPTED_REGEX)
+			is_unplaced = soup.find('p', string=_UNPLACED_REGEX)
+			distribution = soup.find('th', string=_DISTRIBUTION_REGEX)
+			formula = soup.find('th', string=_FORMULA_REGEX)
 
 			# Check if this is an accepted name
 			if is_accepted is not None:
@@ -134,13 +159,21 @@ class WCSP:
 		result = {'name': synonym, 'status': None, 'distribution': None, 'hybrid': False, 'parentage': None}
 		genus = synonym.split(' ')[0]
 
+		# The quick search also accepts GET requests, which can be cached; fall back to the form POST otherwise
+		req = None
 		try:
-			req = self._session.post(self._search_url, data=data)
+			req = self._session.get(self._search_url, params=data)
 		except requests.exceptions.RequestException:
-			return result
+			pass
+
+		if req is None or req.status_code != 200:
+			try:
+				req = self._session.post(self._search_url, data=data)
+			except requests.exceptions.RequestException:
+				return result
 
 		# Parse the response HTML here and check for an accepted name
-		soup = BeautifulSoup(req.text, "lxml")
+		soup = BeautifulSoup(req.content, "lxml")
 		status = findBotanicalName(genus, soup, result)
 		if status is not None:
 			return status
@@ -165,7 +198,7 @@ class WCSP:
 						return result
 
 					# Parse the response HTML here and check for an accepted name
-					soup = BeautifulSoup(req.text, "lxml")
+					soup = BeautifulSoup(req.content, "lxml")
 					status = findBotanicalName(genus, soup, result)
 					if status is not None:
 						return status
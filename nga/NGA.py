@@ -11,20 +11,65 @@ This script is designed for Python 3 and Beautiful Soup 4 with the lxml parser."
 # Module imports
 import os
 import sys
-import json
+import copy
+import gzip
 import re
 import time
 import getpass
-from collections import OrderedDict
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse, parse_qs
 import urllib3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.etree
+import lxml.html
 from bs4 import BeautifulSoup
 from titlecase import titlecase
 from . import core
+try:
+	from selectolax.lexbor import LexborHTMLParser
+	SELECTOLAX_EXISTS = True
+except ImportError:
+	SELECTOLAX_EXISTS = False
+try:
+	import httpx
+	import h2 # pylint: disable=unused-import # Required for HTTP/2 support in httpx
+	HTTPX_EXISTS = True
+except ImportError:
+	HTTPX_EXISTS = False
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Garden.org pages are served as UTF-8, so pass the raw bytes to the parser rather than having requests guess
+_NGA_ENCODING = 'utf-8'
+
+# Parser shared by all single page parses, rather than creating one for each page
+# (the genus pages are fetched concurrently and fed to their own parsers as they arrive)
+_HTML_PARSER = lxml.html.HTMLParser(encoding=_NGA_ENCODING)
+
+# Errors that may be raised when retrieving a genus page
+if HTTPX_EXISTS:
+	_FETCH_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+else:
+	_FETCH_ERRORS = (requests.exceptions.RequestException,)
+
+# Regular expressions used when parsing NGA pages
+_PID_REGEX = re.compile(r'/(\d+)/') # Plant ID in an entry URL
+_PARENTHESES_REGEX = re.compile(r'\((.+)\)', re.DOTALL) # Botanic name and cultivar when a common name is present
+_NON_DIGIT_REGEX = re.compile('[^0-9]') # Used to extract the id number of a form field
+_APPROVE_REGEX = re.compile('approve')
+_VIEW_REGEX = re.compile('/plants/view/')
+
+# Items of the common and botanical name lists on a plant page (matching the class token, as Beautiful Soup does)
+_LIST_ITEM_XPATH = './/li[contains(concat(" ", normalize-space(@class), " "), " list-group-item ")]'
+
+# Strings used to describe unknown parents
+_UNKNOWN_PARENTS = frozenset(('na', 'uk', '?', 'unknown'))
+
 
 class NGA:
 	"""Create a user-friendly API for the NGA website's Plants Database."""
@@ -33,14 +78,27 @@ class NGA:
 		"""Create a requests session."""
 
 		self._session = requests.Session()
+		self._mountAdapter()
 
 		# Requests user agent has been blocked by Garden.org, unfortunately
 		self._session.headers.update({'User-Agent':'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:97.0) Gecko/20100101 Firefox/97.0'})
+		self._session.headers.update({'Connection':'keep-alive'})
+		self._session.headers.update({'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING}) # Genus pages compress well (Brotli is included if installed)
 
 		# Frustratingly, we have to disable SSL verification due to a self-signed cert that doesn't match the hostname
 		self._session.verify = False
 
 
+	def _mountAdapter(self):
+		"""Size the connection pool so that concurrent page fetches can reuse connections.
+		Failed connections are retried with an exponential backoff, as are server errors and rate limiting on idempotent requests
+		(honouring any Retry-After header). Errors on POST requests are not retried so that proposals are never submitted twice."""
+
+		retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._max_workers, max_retries=retries)
+		self._session.mount('https://', adapter)
+
+
 	def __init__(self, nga_path=None):
 		"""Create an instance and set up a requests session to the NGA website."""
 
@@ -63,6 +121,9 @@ class NGA:
 			self._cookiepath = os.path.join(os.path.expanduser('~'), '.nga')
 		self._nga_cookie = requests.cookies.RequestsCookieJar() # pylint: disable=abstract-class-instantiated
 
+		# Number of pages to fetch concurrently
+		self._max_workers = 8
+
 		# Create the session
 		self._createSession()
 
@@ -73,11 +134,21 @@ class NGA:
 		self._session.cookies = self._nga_cookie
 		self._session.get(self._home_url)
 
-		# Delay to wait before hitting NGA servers again if the connection failed
-		self._recursion_delay = 1
-
 		# Declare attributes
 		self._genus_results = {}
+		self._genus_client = None # HTTP/2 client, only open while a genus is being fetched
+
+		# Optional cache of genus pages (disabled unless a directory is set)
+		self._cache = None
+		self._cache_age = datetime.now() - timedelta(days=1) # Default value
+
+		# Results of page lookups, cleared whenever a proposal is submitted
+		self._search_cache = {}
+		self._parentage_cache = {}
+
+		# Recently retrieved plant pages, keyed by URL, as several checks and proposals may request the same page
+		self._page_cache = {}
+		self._page_ttl = 60 # Seconds
 
 
 	def _loadCookieArchive(self, cookiepath):
@@ -85,12 +156,17 @@ class NGA:
 
 		if os.path.exists(cookiepath):
 			# Open the JSON file
-			with open(cookiepath, 'r', encoding='utf-8') as file_desc:
+			with open(cookiepath, 'rb') as file_desc:
 				# Try to read the JSON string and set the cookie parameters
 				try:
-					cookie = json.load(file_desc)
+					cookie = core.jsonLoads(file_desc.read())
 					self._nga_cookie.set('gojwt', cookie['gojwt'], domain='garden.org', path='/')
 
+					# Restore the rest of the stored session cookies so that the server doesn't need to issue them again
+					for (name, value) in cookie.items():
+						if name != 'gojwt':
+							self._nga_cookie.set(name, value, domain='garden.org', path='/')
+
 				except Exception as err:
 					# We must have a valid cookie file, or the NGA site will block us`
 					print(f'Error loading cookie archive {cookiepath}. A valid cookie file is required to use this script.')
@@ -107,12 +183,12 @@ class NGA:
 		"""Store a JSON file containing cookies for the NGA website."""
 
 		# Open the file for writing
-		with open(self._cookiepath, 'w', encoding='utf-8') as file_desc:
+		with open(self._cookiepath, 'wb') as file_desc:
 			os.chmod(self._cookiepath, 0o0600) # Try to ensure only the user can read it
 
 			# Try to write the JSON string)
 			try:
-				json.dump(cookiejson, file_desc)
+				file_desc.write(core.jsonDumpsBytes(cookiejson))
 
 			except Exception as err:
 				# We must have a valid cookie file, or the NGA site will block us`
@@ -138,7 +214,7 @@ class NGA:
 
 		# Successfully retrieved the login page
 		target = urljoin(self._home_url, '/i/ajax/users/login_check.php')
-		soup = BeautifulSoup(req.text, "lxml")
+		soup = BeautifulSoup(req.content, "lxml", from_encoding=_NGA_ENCODING)
 
 		# Find the redirect address
 		redirect_url = soup.find(id='login_redirect')['value']
@@ -183,51 +259,107 @@ class NGA:
 		self._session.get(self._home_url)
 
 
-	def _parseGenusPage(self, page_soup, genus=None):
-		"""Parse a BeautifulSoup object returned by the _fetchGenusPage function."""
+	def setMaxWorkers(self, max_workers):
+		"""Specify the number of pages that may be fetched concurrently."""
 
-		# Get the table on the page
-		if page_soup is not None:
-			table = page_soup.find('table')
+		self._max_workers = max(1, int(max_workers))
+		self._mountAdapter()
 
-			# Iterate through the table
-			if table is not None and len(table) > 0:
 
-				# Iterate through all rows of the table
-				for row in table.findAll('tr'):
+	def setCache(self, cache_path):
+		"""Specify a directory in which to cache genus pages."""
 
-					# Extract the contents of the row
-					(botanic_name, cultivar_name, plant_data) = _parseTableRow(row, genus)
+		if os.path.exists(cache_path):
+			self._cache = cache_path
+		else:
+			print("Error: invalid path supplied")
 
-					if botanic_name is not None:
-						botanic_name = botanic_name.replace('  ',' ')
 
-						# Add entry to results
-						if botanic_name not in self._genus_results:
-							self._genus_results[botanic_name] = {}
+	def setCacheAge(self, cache_age_td):
+		"""Specify the maximum age of cached genus pages as a timedelta."""
 
-						self._genus_results[botanic_name][cultivar_name] = plant_data
+		self._cache_age = datetime.now() - cache_age_td
 
 
-	def _parseGenusPages(self, pages, genus=None, verbosity=1):
-		"""Parse a list of the BeautifulSoup object returned by the _fetchGenusPage function."""
+	def _parseGenusPage(self, page_tree, genus=None):
+		"""Parse a page tree returned by the _fetchGenusPage function.
+		Returns a list of (botanic name, cultivar name, plant data) tuples."""
 
-		# Initialise the dataset
-		self._genus_results = {}
+		# Get the rows of the table on the page (skipping the header rows)
+		if page_tree is None:
+			rows = []
+		elif SELECTOLAX_EXISTS:
+			table = page_tree.css_first('table')
+			rows = _selectDataRows(table) if table is not None else []
+		else:
+			table = page_tree.find('.//table')
+			rows = table.xpath('.//tr[not(.//th)]') if table is not None else []
 
-		core.stdoutWF("\rParsing NGA dataset...", 1, verbosity)
-		total = len(pages)
-		count = 1
+		entries = []
+		for row in rows:
 
-		for page in pages:
-			core.stdoutWF(f'\rParsing NGA dataset... {count:d}/{total:d}', 2, verbosity)
-			self._parseGenusPage(page, genus)
-			count += 1
+			# Extract the contents of the row
+			if SELECTOLAX_EXISTS:
+				(botanic_name, cultivar_name, plant_data) = _parseTableRowSelectolax(row, genus)
+			else:
+				(botanic_name, cultivar_name, plant_data) = _parseTableRow(row, genus)
 
-		n_entries = len(list(self._genus_results))
-		core.stdoutWF(f'\rParsing NGA dataset... done. {n_entries:d} botanic name(s) found.\r\n', 1, verbosity)
+			if botanic_name is not None:
+				entries.append((botanic_name.replace('  ',' '), cultivar_name, plant_data))
+
+		return entries
 
-		return self._genus_results
+
+	def _addGenusEntries(self, entries):
+		"""Add the entries parsed from a genus page to the dataset."""
+
+		results = self._genus_results
+		for (botanic_name, cultivar_name, plant_data) in entries:
+			results.setdefault(botanic_name, {})[cultivar_name] = plant_data
+
+
+	def _fetchGenusEntries(self, genus, offset=None):
+		"""Retrieve and parse a single page of genus data from the NGA database.
+		The page tree is discarded once it has been parsed, so only the extracted entries are kept in memory.
+		Returns the pagination details (for the first page only) and the list of entries."""
+
+		page_tree = self._fetchGenusPage(genus, offset)
+		pagination = _parsePagination(page_tree) if offset is None else None
+
+		return (pagination, self._parseGenusPage(page_tree, genus))
+
+
+	@contextmanager
+	def _openGenusClient(self):
+		"""Open an HTTP/2 client for the duration of a genus download if httpx is available,
+		so that the concurrent page requests are multiplexed over a single connection.
+		The client uses the headers and cookies of the requests session."""
+
+		if not HTTPX_EXISTS:
+			yield None
+			return
+
+		transport = httpx.HTTPTransport(http2=True, verify=False, retries=3, limits=httpx.Limits(max_connections=self._max_workers))
+
+		with httpx.Client(transport=transport, headers=dict(self._session.headers), cookies=self._session.cookies) as client:
+			self._genus_client = client
+			try:
+				yield client
+			finally:
+				self._genus_client = None
+
+
+	@contextmanager
+	def _streamGenusPage(self, url, params, headers):
+		"""Stream a genus page with the HTTP/2 client if one is open, otherwise with the requests session.
+		Yields the status code, the response headers and an iterator over the content."""
+
+		if self._genus_client is not None:
+			with self._genus_client.stream('GET', url, params=params, headers=headers) as req:
+				yield (req.status_code, req.headers, req.iter_bytes(16384))
+		else:
+			with self._session.get(url, params=params, headers=headers, stream=True) as req:
+				yield (req.status_code, req.headers, req.iter_content(16384))
 
 
 	def _fetchGenusPage(self, genus, offset=None):
@@ -238,15 +370,74 @@ class NGA:
 		else:
 			params = {}
 
+		# Feed the HTML to the parser as it arrives rather than buffering the whole page first
+		# (a new parser is required for each page, as they are fetched concurrently)
+		# selectolax cannot parse incrementally, but is considerably faster once the page is complete
+		parser = None if SELECTOLAX_EXISTS else lxml.html.HTMLParser()
+
+		# Check for a copy of this page in the cache
+		cpath = None
+		vpath = None
+		headers = {}
+		if self._cache is not None:
+			cpath = os.path.join(self._cache, f'{genus}-{offset or 0}.html.gz')
+			vpath = os.path.join(self._cache, f'{genus}-{offset or 0}.json')
+
+			if os.path.exists(cpath):
+				# Use a recent copy as is
+				if datetime.fromtimestamp(os.path.getmtime(cpath)) > self._cache_age:
+					page_tree = _readCachedPage(cpath)
+					if page_tree is not None:
+						return page_tree
+
+				# Otherwise ask the server to only send the page if it has changed
+				elif os.path.exists(vpath):
+					with open(vpath, 'rb') as file_desc:
+						validators = core.jsonLoads(file_desc.read())
+					if 'etag' in validators:
+						headers['If-None-Match'] = validators['etag']
+					if 'last_modified' in validators:
+						headers['If-Modified-Since'] = validators['last_modified']
+
+		chunks = []
 		try:
-			req = self._session.get(self._genus_url % genus, params=params)
-		except requests.exceptions.RequestException:
+			with self._streamGenusPage(self._genus_url % genus, params, headers) as (status_code, response_headers, content):
+				if status_code == 304:
+					# The cached page is still current, so mark it as fresh and use it
+					os.utime(cpath)
+					return _readCachedPage(cpath)
+
+				for chunk in content:
+					if parser is not None:
+						parser.feed(chunk)
+					if parser is None or cpath is not None:
+						chunks.append(chunk)
+		except _FETCH_ERRORS:
 			core.stderrWF(f'\nError retrieving NGA database page for genus {genus}. Cannot continue.')
 			sys.exit(1)
 		else:
+			# Store the page in the cache, along with any validators for conditional requests
+			if cpath is not None and status_code == 200:
+				with gzip.open(cpath, 'wb') as file_desc:
+					file_desc.writelines(chunks)
+
+				validators = {}
+				if 'ETag' in response_headers:
+					validators['etag'] = response_headers['ETag']
+				if 'Last-Modified' in response_headers:
+					validators['last_modified'] = response_headers['Last-Modified']
+
+				with open(vpath, 'wb') as file_desc:
+					file_desc.write(core.jsonDumpsBytes(validators))
+
 			# Parse the returned HTML
-			soup = BeautifulSoup(req.text, "lxml")
-			return soup
+			if parser is None:
+				return _parsePageContent(b''.join(chunks))
+
+			try:
+				return parser.close()
+			except lxml.etree.XMLSyntaxError:
+				core.stderrWF(f'\nEmpty NGA database page returned for genus {genus}.')
 
 		return None
 
@@ -255,109 +446,116 @@ class NGA:
 		"""Retrieve the list of entries for a genus from the NGA database."""
 
 		core.stdoutWF("\rRetrieving NGA dataset...", 1, verbosity)
-		genus_pages = []
 
-		# Get the first page and find the number of plants and pages
-		genus_pages.append(self._fetchGenusPage(genus))
-
-		if genus_pages[0] is not None:
-
-			# Determine number of pages of data in this genus
-			pages = genus_pages[0].findAll('a', {'class':'page-link'})
-			increment = None
-			npages = 1
-
-			if pages is not None:
-				for page in pages:
-					pgnum = page.text
-					pgurl = urlparse(page['href']) # Parse the URL
-					pgquery = parse_qs(pgurl.query)
-					if 'offset' in pgquery:
-						pgoffset = pgquery['offset'][0] # Extract the offset
-
-						try:
-							# Extract the offset (based on the link to page 2)
-							num = int(pgnum)
-							offset = int(pgoffset)
-							if num == 2:
-								increment = offset
+		# Initialise the dataset
+		self._genus_results = {}
 
-							# Get the number of pages (look for the highest number)
-							npages = max(npages, num)
+		# The requests are network-bound, so fetch and parse them concurrently
+		with self._openGenusClient(), ThreadPoolExecutor(max_workers=self._max_workers) as executor:
 
-						except ValueError:
-							pass
+			# Get the first page and find the number of plants and pages
+			((increment, npages), entries) = self._fetchGenusEntries(genus)
+			self._addGenusEntries(entries)
 
 			# If increment is still None at this stage, then there is only one page
 			# Otherwise fetch all the remaining pages
 			if increment is not None:
+				futures = [executor.submit(self._fetchGenusEntries, genus, page*increment) for page in range(1, npages)]
 
-				# Tested adding multithreading here, but it doesn't provide enough of a benefit
-				for page in range(1, npages):
-					core.stdoutWF(f'\rRetrieving NGA dataset... {page+1:d}/{npages:d}', 2, verbosity)
-					genus_pages.append(self._fetchGenusPage(genus, page*increment))
-
+				# Add the entries in page order so that the dataset order matches the website
+				last_update = 0.0
+				for (page, future) in enumerate(futures, 2):
+					last_update = core.stdoutProgress('\rRetrieving NGA dataset... {:d}/{:d}', last_update, 2, verbosity, (page, npages))
+					self._addGenusEntries(future.result()[1])
 
+		n_entries = len(self._genus_results)
 		if verbosity > 1:
-			core.stdoutWF("\rRetrieving NGA dataset... done.        \r\n")
+			core.stdoutWF(f'\rRetrieving NGA dataset... done. {n_entries:d} botanic name(s) found.\r\n')
 		elif verbosity > 0:
-			core.stdoutWF(" done.\r\n")
+			core.stdoutWF(f' done. {n_entries:d} botanic name(s) found.\r\n')
+
+		return self._genus_results
+
+
+	def clearCaches(self):
+		"""Discard any cached search results, parentage field checks and plant pages."""
 
-		# Parse the pages and extract the species and cultivars
-		return self._parseGenusPages(genus_pages, genus, verbosity)
+		self._search_cache.clear()
+		self._parentage_cache.clear()
+		self._page_cache.clear()
 
 
-	def search(self, search_term, recursed=False):
+	def _getPlantPage(self, url, force=False):
+		"""Retrieve a public plant view page, reusing the response if the same page was retrieved within the last _page_ttl seconds.
+		Edit form pages shouldn't be retrieved this way, as they must be current when a proposal is made.
+		Raises a requests exception if the request fails."""
+
+		now = time.monotonic()
+		if url in self._page_cache and not force:
+			(timestamp, req) = self._page_cache[url]
+			if now - timestamp < self._page_ttl:
+				return req
+
+		req = self._session.get(url)
+
+		# Redirected responses (e.g. to the not allowed page) aren't cached under the requested URL
+		if req.status_code == 200 and not req.history:
+			# Discard expired pages so that the cache doesn't grow over a long run
+			self._page_cache = {key: entry for (key, entry) in self._page_cache.items() if now - entry[0] < self._page_ttl}
+			self._page_cache[url] = (now, req)
+
+		return req
+
+
+	def search(self, search_term, force=False):
 		"""Search the NGA plant database for a given entry.
-		Returns a dictionary of matches grouped by botanical name."""
+		Returns a dictionary of matches grouped by botanical name.
+		Results are cached by search term unless force is set."""
+
+		# Return a copy, as callers are free to modify the plant objects
+		if search_term in self._search_cache and not force:
+			return copy.deepcopy(self._search_cache[search_term])
 
 		params = {'q':search_term}
 
 		try:
 			req = self._session.get(self._search_url, params=params)
 		except requests.exceptions.RequestException as err:
-			if not recursed:
-				time.sleep(self._recursion_delay)
-				return self.search(search_term, True)
-
 			print(f'Error retrieving NGA search results for {search_term}.')
 			print(str(err))
 			return None
 
-		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		caption = soup.find('caption',string="Search Results")
+		# An empty page is treated as a failed request rather than as having no results
+		if len(req.content.strip()) == 0:
+			return None
 
-		# If there are search results, then the caption will exist
-		if caption is not None:
-			table = caption.parent
-			rows = table.findAll('tr')
+		# Parse the returned HTML
+		rows = _parseSearchResults(req.content)
+		botanic_entries = None # No search results
 
+		if rows is not None:
 			botanic_entries = {}
 
-			# Process all the rows and extract the botanic and cultivar names
-			for row in rows:
-				(botanic_name, cultivar_name, plant_data) = _parseTableRow(row)
+			# Group the rows by the botanic and cultivar names
+			for (botanic_name, cultivar_name, plant_data) in rows:
 				if botanic_name not in botanic_entries:
 					botanic_entries[botanic_name] = {cultivar_name: plant_data}
 				else:
 					botanic_entries[botanic_name][cultivar_name] = plant_data
 
-			return botanic_entries
-
-		# No search results
-		return None
+		self._search_cache[search_term] = copy.deepcopy(botanic_entries)
+		return botanic_entries
 
 
 	def checkPageFields(self, plant, verbosity=0):
 		"""Check which fields are populated on a plant database entry. Useful for determining if we can automatically merge entries."""
 
-		planturl = urljoin(self._home_url, plant['url'])
+		planturl = _absoluteURL(self._home_url, plant['url'])
 		if verbosity > 2:
 			print(f'Analysing fields for {plant["full_name"]} at {plant["url"]}.')
 
 		try:
-			req = self._session.get(planturl)
+			req = self._getPlantPage(planturl)
 		except requests.exceptions.RequestException as err:
 			print(f'Error retrieving NGA plant entry for {plant["full_name"]}.')
 			print(str(err))
@@ -373,13 +571,15 @@ class NGA:
 		}
 
 		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
+		tree = _parsePageTree(req.content)
+		if tree is None:
+			return fields
 
 		# Look for class "card-header", as this is used for the common names, botanical names, conservation status, images and comments
-		cards = soup.findAll('div', {'class':'card-header'})
+		cards = tree.xpath('//div[contains(concat(" ", normalize-space(@class), " "), " card-header ")]')
 		if len(cards) > 0:
 			for card in cards:
-				contents = card.get_text().strip().strip(':')
+				contents = card.text_content().strip().strip(':')
 				# Exclude the photo gallery, plant combinations, comments and discussion threads, as these are preserved during a merge
 				# Also ignore conservation status as this would need to be rechecked
 				if contents not in ('Botanical names','Common names','Photo Gallery','This plant is tagged in','Comments','Discussion Threads about this plant','Conservation status'):
@@ -387,38 +587,38 @@ class NGA:
 
 				# Common names are not automatically transferred, but are one we can automate
 				if contents == 'Common names':
-					container = card.parent
-					cnames = container.findAll('li',{'class':'list-group-item'})
+					container = card.getparent()
+					cnames = container.xpath(_LIST_ITEM_XPATH)
 					for cname in cnames:
-						common_name = list(cname.stripped_strings)[-1]
-						fields['common_names'].append(titlecase(common_name))
+						common_name = _strippedStrings(cname)[-1]
+						fields['common_names'].append(_titleCase(common_name))
 
 				if contents == 'Botanical names':
-					container = card.parent
-					bnames = container.findAll('li',{'class':'list-group-item'})
+					container = card.getparent()
+					bnames = container.xpath(_LIST_ITEM_XPATH)
 					for bname in bnames:
-						botanical_name = list(bname.stripped_strings)
+						botanical_name = _strippedStrings(bname)
 						if 'synonym' in botanical_name[0].lower():
 							fields['botanical_names'].append(botanical_name[-1])
 
 		# Look for the caption element, as this indicates data tables
-		captions = soup.findAll('caption')
+		captions = tree.xpath('//caption')
 		if len(captions) > 0:
 			for caption in captions:
-				databox_name = caption.get_text().strip().split(' (')[0]
+				databox_name = caption.text_content().strip().split(' (')[0]
 
 				# Exclude plant events, as these are preserved during a merge
 				if databox_name not in 'Plant Events from our members':
-					cparent = caption.parent
-					rows = cparent.find_all('tr')
+					cparent = caption.getparent()
+					rows = cparent.xpath('.//tr')
 					rcount = len(rows)
 					dataset = {}
 
 					# Check the table rows to see if we can ignore the fields that are present
 					for row in rows:
-						cells = row.find_all('td')
-						rowlabel = cells[0].get_text().strip().replace(":","")
-						rowvalue = cells[1].get_text().strip()
+						cells = row.xpath('.//td')
+						rowlabel = cells[0].text_content().strip().replace(":","")
+						rowvalue = cells[1].text_content().strip()
 
 						# Some of these are checkboxes and each entry is on a separate line, so try splitting them up
 						if '\n' in rowvalue:
@@ -444,27 +644,38 @@ class NGA:
 		return fields
 
 
-	def checkParentageField(self, plant, recursed=False):
-		"""Check if the parentage field exists for an entry."""
+	def checkParentageField(self, plant, force=False):
+		"""Check if the parentage field exists for an entry.
+		Results are cached by plant URL unless force is set."""
 
-		planturl = urljoin(self._home_url, plant['url'])
+		planturl = _absoluteURL(self._home_url, plant['url'])
+
+		if planturl in self._parentage_cache and not force:
+			return self._parentage_cache[planturl]
 
 		try:
-			req = self._session.get(planturl)
+			req = self._getPlantPage(planturl, force)
 		except requests.exceptions.RequestException as err:
-			if not recursed:
-				time.sleep(self._recursion_delay)
-				return self.checkParentageField(plant, True)
-
 			print(f'Error retrieving NGA plant entry for {plant["full_name"]}.')
 			print(str(err))
 			return None
 
-		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		parentage = soup.find('b', string=re.compile('Parentage'))
+		# Most entries have no parentage field at all, in which case the page doesn't need to be parsed
+		# (an empty page has no parentage field either, but isn't cached in case it was a transient error)
+		if b'Parentage' not in req.content:
+			if len(req.content.strip()) > 0:
+				self._parentage_cache[planturl] = False
+			return False
+
+		# Parse the returned HTML and look for the bold field label
+		tree = _parsePageTree(req.content)
+		if tree is None:
+			return False
 
-		return parentage is not None
+		parentage = tree.xpath('//b[contains(text(), "Parentage")]')
+
+		self._parentage_cache[planturl] = len(parentage) > 0
+		return self._parentage_cache[planturl]
 
 
 	def _submitProposal(self, url, data, auto_approve=True):
@@ -475,34 +686,33 @@ class NGA:
 			- False if submitted but not approved
 			- None otherwise"""
 
+		# The database may be about to change, so any cached lookups could be stale
+		self.clearCaches()
+
+		# Scan the returned HTML for the approval link, without reading the rest of the page
+		# (the approval link takes precedence over an alert anywhere on the page, so an alert is only returned if there is no link)
 		try:
-			req = self._session.post(url, data=data)
+			with self._session.post(url, data=data, stream=True) as req:
+				result = _scanResponse(req, (_isApproveLink,), (_isFailureAlert,))
 		except requests.exceptions.RequestException as err:
 			print("Failed to submit proposal", str(err))
 			return None
 
-		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		confirmation = soup.findAll('a', attrs={'href': re.compile("approve")})
-		alert = soup.findAll('div', attrs={'class': 'alert-danger'})
-
-		if confirmation is not None and len(confirmation) > 0:
+		if result is not None and result.tag == 'a':
 			if auto_approve:
-				subpage = confirmation[0]['href']
+				subpage = result.get('href')
 				suburl = urljoin(self._home_url, subpage)
 
+				# Alerts are used for approvals via queue, and view links only for the direct path of new plant proposals
 				try:
-					req = self._session.get(suburl)
+					with self._session.get(suburl, stream=True) as req:
+						approved = _scanResponse(req, (_isSuccessAlert, _isViewLink))
 				except requests.exceptions.RequestException as err:
 					print("Failed to approve proposal", str(err))
 					print(str(err))
 					return False
 
-				soup = BeautifulSoup(req.text, "lxml")
-				approved1 = soup.findAll('div', {'class':'alert-success'}) # Used for approvals via queue
-				approved2 = soup.findAll('a', attrs={'href': re.compile("/plants/view/")}) # Only used for direct path of new plant proposals
-
-				if (approved1 and len(approved1) > 0) or (approved2 and len(approved2) > 0):
+				if approved is not None:
 					print("\tProposal approved.")
 					return True
 
@@ -512,7 +722,7 @@ class NGA:
 			print("\tProposal submitted.")
 			return False
 
-		if alert is not None and len(alert) > 0:
+		if result is not None:
 			print("\tFailed to submit proposal - name already in use.")
 		else:
 			print("\tFailed to submit proposal.")
@@ -520,45 +730,32 @@ class NGA:
 		return None
 
 
-	def fetchNewProposals(self, recursed=False):
+	def fetchNewProposals(self):
 		"""Check to see if a new plant proposal exists. Requires admin rights."""
 
+		# Failed connections are retried by the session adapter
 		try:
 			req = self._session.get(self._new_proposals_url)
-		except requests.exceptions.ConnectionError as err:
-			if not recursed:
-				time.sleep(1)
-				return self.fetchNewProposals(True)
-
-			print(str(err))
-			return None
 		except requests.exceptions.RequestException as err:
 			print(str(err))
 			return None
 
-		soup = BeautifulSoup(req.text, "lxml")
-		#ptable = soup.find("table", {"id":"table"})
-		proposals = soup.findAll('tr')
+		tree = _parsePageTree(req.content)
+		if tree is None:
+			return {}
+
+		# Skip the header rows
+		proposals = tree.xpath('//tr[not(.//th)]')
 		pending = {}
 
 		for proposal in proposals:
-			if proposal.find("th") is not None:
-				continue
+			(pid, genus, species, cultivar, tradename, series) = [cell.text_content().strip() for cell in proposal.findall('.//td')[:6]]
 
-			cells = proposal.findAll("td")
-			pid = int(cells[0].get_text().strip())
-			genus = cells[1].get_text().strip()
-			species = cells[2].get_text().strip()
-			cultivar = cells[3].get_text().strip()
-			tradename = cells[4].get_text().strip()
-			series = cells[5].get_text().strip()
-
-			if len(cultivar) == len(tradename) == len(series) == 0:
-				botanical_name = f'{genus} {species}'
-				if botanical_name not in pending:
-					pending[botanical_name] = []
+			# Only proposals for species (without a cultivar, trade name or series) are tracked
+			if cultivar or tradename or series:
+				continue
 
-				pending[botanical_name].append(pid)
+			pending.setdefault(f'{genus} {species}', []).append(int(pid))
 
 		return pending
 
@@ -571,15 +768,12 @@ class NGA:
 		}
 
 		try:
-			req = self._session.post(self._new_approvals_url, data=params)
+			with self._session.post(self._new_approvals_url, data=params, stream=True) as req:
+				approved = _scanResponse(req, (_isViewLink,))
 		except requests.exceptions.RequestException as err:
 			print("\tFailed to approval proposal", str(err))
 		else:
-			# Parse the response
-			soup = BeautifulSoup(req.text, "lxml")
-			approved = soup.findAll('a', attrs={'href': re.compile("/plants/view/")})
-
-			if approved and len(approved) > 0:
+			if approved is not None:
 				print("\tProposal approved.")
 			else:
 				print("\tProposal not approved.")
@@ -611,6 +805,32 @@ class NGA:
 		self._submitProposal(self._new_plant_url, params)
 
 
+	def _fetchNameForm(self, url, plant):
+		"""Retrieve the name proposal form for a plant.
+		Returns the tables of the form keyed by id, or None if the form is unavailable."""
+
+		try:
+			req = self._session.get(url)
+		except requests.exceptions.RequestException as err:
+			print(f'Error retrieving NGA database name page for {plant["full_name"]}.')
+			print(str(err))
+			return None
+
+		if req.url == self._not_allowed_url:
+			print('Error: you do not have access to propose changes. Check authentication.')
+			return None
+
+		# Parse the returned HTML
+		tree = _parsePageTree(req.content)
+		if tree is None:
+			return None
+
+		form = tree.xpath('//form[@method="post"]')[0]
+
+		# Collect the name tables in a single pass over the form
+		return {table.get('id'): table for table in form.xpath('.//table[@id]')}
+
+
 	def proposeSynonymAddition(self, plant, synonyms, common_names=None, auto_approve=True):
 		"""Propose the addition of a synonym to a plant entry in the database.
 		Expects 'plant' to be a dictionary:
@@ -628,50 +848,21 @@ class NGA:
 			- False if proposal submitted but not approved
 			- None otherwise"""
 
-		# Prepare the url
+		# Retrieve the existing names
 		url = self._plant_name_url % plant['pid']
-
-		try:
-			req = self._session.get(url)
-		except requests.exceptions.RequestException as err:
-			print(f'Error retrieving NGA database name page for {plant["full_name"]}.')
-			print(str(err))
+		tables = self._fetchNameForm(url, plant)
+		if tables is None:
 			return None
 
-		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		form = soup.find('form', attrs={'method': 'post'})
-		data = OrderedDict() # This is crucial. New fields are processed server-side in the order that they are added.
-
-		# Latin names
-		latin_table = form.find('table', attrs={'id': 'latin-table'})
-		lnames = latin_table.findAll(['input','select'])
-
-		lparams = OrderedDict() # Must be ordered!
-
-		# Iterate through all the botanical names and make sure existing entries are preserved
-		for i in lnames:
-			# Extract the id number for this latin name
-			name = i['name']
-			name_id = re.sub('[^0-9]','',name)
-			if name_id not in lparams:
-				lparams[name_id] = {}
-
-			# Get the latin name
-			if 'status' not in name:
-				lparams[name_id]['latin'] = i['value']
-
-				# Check if the synonym is already present
-				# TO DO: Check for misspellings in future
-				latin_name = i['value'].strip()
-				if latin_name in synonyms:
-					synonyms.remove(latin_name)
-
-			# Get the current status of the name
-			else:
-				selector = i.findAll('option', selected=True)
-				svalue = selector[0]['value']
-				lparams[name_id]['latin_status'] = svalue
+		data = {} # Order is crucial; new fields are processed server-side in the order that they are added (dicts preserve insertion order).
+		lparams = _readLatinNames(tables['latin-table'])
+
+		# Check if the synonyms are already present
+		# TO DO: Check for misspellings in future
+		for lentry in lparams.values():
+			latin_name = lentry['latin'].strip()
+			if latin_name in synonyms:
+				synonyms.remove(latin_name)
 
 		syn_count = len(synonyms)
 		if syn_count < 1:
@@ -682,79 +873,20 @@ class NGA:
 		lparams['new'] = {'latin':synonyms, 'latin_status':['synonym']*syn_count}
 
 		# Add the latin names to the object
-		for param in lparams:
+		for (param, lentry) in lparams.items():
 			if param == 'new':
-				data['latin[]'] = lparams[param]['latin']
-				data['latin_status[]'] = lparams[param]['latin_status']
+				data['latin[]'] = lentry['latin']
+				data['latin_status[]'] = lentry['latin_status']
 			else:
-				data[f'latin[{param}]'] = lparams[param]['latin']
-				data[f'latin_status[{param}]'] = lparams[param]['latin_status']
-
-		# Common names
-		common_table = form.find('table', attrs={'id': 'common-table'})
-		cnames = common_table.findAll('input')
-
-		cname_exclude = None
-		if 'common_exclude' in plant:
-			cname_exclude = plant['common_exclude'].strip().lower()
-
-		if len(cnames) < 1:
-			# If there are no common names and one has been provided, add it
-			if common_names is not None and len(common_names) > 0:
-				data['common[]'] = common_names
-		else:
-			# Prepare data for common name validation
-			synonym_genera = None
-			if common_names is not None and len(common_names) > 0:
-				common_lower = {name.lower():name for name in common_names}
-			else:
-				common_lower = {}
-
-			synonym_genera = [synonym.split(' ')[0].strip().lower() for synonym in synonyms]
-
-			# Cycle through the existing common names and ensure they are included
-			# (unless they are the genus)
-			for cname in cnames:
-				common_tidied = cname['value'].strip().lower()
-
-				# Check if the common name is already present
-				if common_tidied in common_lower:
-					common_names.remove(common_lower[common_tidied])
-
-				# If the common name isn't the genus, copy it
-				if common_tidied not in synonym_genera + [cname_exclude]:
-					data[cname['name']] = cname['value']
-
-			# If the provided common name wasn't listed, add it
-			if common_names is not None and len(common_names) > 0:
-				data['common[]'] = common_names
-
-		# Tradename and series
-		trade_table = form.find('table', attrs={'id': 'tradename-table'})
-		trade_data = trade_table.findAll('input')
-
-		# Copy any existing trade name data
-		for trade_entry in trade_data:
-			if trade_entry['name'] in 'tradename' and len(trade_entry['value'].strip()) < 1 and 'remove_quotes' in plant and plant['remove_quotes']:
-				data[trade_entry['name']] = plant['cleaned_name']
-			else:
-				data[trade_entry['name']] = trade_entry['value']
-
-		# Cultivars
-		cultivar_table = form.find('table', attrs={'id': 'cultivar-table'})
-		cultivars = cultivar_table.findAll('input')
+				data[f'latin[{param}]'] = lentry['latin']
+				data[f'latin_status[{param}]'] = lentry['latin_status']
 
-		# Copy any existing cultivars
-		for cultivar in cultivars:
-			data[cultivar['name']] = cultivar['value']
+		# Common names (excluding any that are the genus of a synonym)
+		synonym_genera = {synonym.split(' ')[0].strip().lower() for synonym in synonyms}
+		_addCommonNames(tables['common-table'], data, plant, common_names, synonym_genera)
 
-		# Also sold as
-		asa_table = form.find('table', attrs={'id': 'asa-table'})
-		aliases = asa_table.findAll('asa')
-
-		# Copy any existing aliases
-		for alias in aliases:
-			data[alias['name']] = alias['value']
+		# Tradename, series, cultivars and aliases
+		_copyNameFields(tables, data, plant)
 
 		data['submit'] = 'Submit your proposed changes'
 
@@ -779,53 +911,22 @@ class NGA:
 			- False if proposal submitted but not approved
 			- None otherwise"""
 
-		# Prepare the url
+		# Retrieve the existing names
 		url = self._plant_name_url % plant['pid']
-
-		try:
-			req = self._session.get(url)
-		except requests.exceptions.RequestException as err:
-			print(f'Error retrieving NGA database name page for {plant["full_name"]}.')
-			print(str(err))
+		tables = self._fetchNameForm(url, plant)
+		if tables is None:
 			return None
 
-		if req.url == self._not_allowed_url:
-			print('Error: you do not have access to propose changes. Check authentication.')
-			return None
+		data = {} # Order is crucial; new fields are processed server-side in the order that they are added (dicts preserve insertion order).
+		lparams = _readLatinNames(tables['latin-table'])
 
-		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		form = soup.find('form', attrs={'method': 'post'})
-		data = OrderedDict() # This is crucial. New fields are processed server-side in the order that they are added.
-
-		# Latin names
-		latin_table = form.find('table', attrs={'id': 'latin-table'})
-		lnames = latin_table.findAll(['input','select'])
-
-		lparams = OrderedDict() # Must be ordered!
+		# Find the accepted name
 		accepted = None
 		accepted_name = None
-
-		for i in lnames:
-			# Extract the id number for this latin name
-			name = i['name']
-			name_id = re.sub('[^0-9]','',name)
-			if name_id not in lparams:
-				lparams[name_id] = {}
-
-			# Get the latin name
-			if 'status' not in name:
-				lparams[name_id]['latin'] = i['value']
-
-			# Get the current status of the name
-			else:
-				selector = i.findAll('option', selected=True)
-				svalue = selector[0]['value']
-				lparams[name_id]['latin_status'] = svalue
-
-				if 'accepted' in svalue.lower():
-					accepted = name_id
-					accepted_name = lparams[name_id]['latin']
+		for (name_id, lentry) in lparams.items():
+			if 'accepted' in lentry['latin_status'].lower():
+				accepted = name_id
+				accepted_name = lentry['latin']
 
 		# Either replace the name (fix spelling) or add the new name as the accepted one
 		if accepted is not None:
@@ -843,8 +944,7 @@ class NGA:
 					found = False
 
 					# Check that the newly accepted name isn't a synonym already
-					for param in lparams:
-						lentry = lparams[param]
+					for lentry in lparams.values():
 						if lentry['latin'] == plant['new_bot_name']:
 							lentry['latin_status'] = 'accepted'
 							found = True
@@ -854,80 +954,22 @@ class NGA:
 						lparams['new'] = {'latin':plant['new_bot_name'], 'latin_status':'accepted'}
 
 		# Add the latin names to the object
-		for param in lparams:
+		for (param, lentry) in lparams.items():
 			if param == 'new':
-				data['latin[]'] = lparams[param]['latin']
-				data['latin_status[]'] = lparams[param]['latin_status']
-			else:
-				data[f'latin[{param}]'] = lparams[param]['latin']
-				data[f'latin_status[{param}]'] = lparams[param]['latin_status']
-
-		# Common names
-		common_table = form.find('table', attrs={'id': 'common-table'})
-		cnames = common_table.findAll('input')
-
-		cname_exclude = None
-		if 'common_exclude' in plant:
-			cname_exclude = plant['common_exclude'].strip().lower()
-
-		if len(cnames) < 1:
-			# If there are no common names and one has been provided, add it
-			if common_names is not None and len(common_names) > 0:
-				data['common[]'] = common_names
-		else:
-			# Prepare data for common name validation
-			accepted_genus = None
-			if common_names is not None and len(common_names) > 0:
-				common_lower = {name.lower():name for name in common_names}
-			else:
-				common_lower = {}
-
-			if accepted_name is not None:
-				accepted_genus = accepted_name.split(' ')[0].strip().lower()
-
-			# Cycle through the existing common names and ensure they are included
-			# (unless they are the genus)
-			for cname in cnames:
-				common_tidied = cname['value'].strip().lower()
-
-				# Check if the common name is already present
-				if common_tidied in common_lower:
-					common_names.remove(common_lower[common_tidied])
-
-				# If the common name isn't the genus, copy it
-				if common_tidied not in (accepted_genus, cname_exclude):
-					data[cname['name']] = cname['value']
-
-			# If the provided common name wasn't listed, add it
-			if common_names is not None and len(common_names) > 0:
-				data['common[]'] = common_names
-
-		# Tradename and series
-		trade_table = form.find('table', attrs={'id': 'tradename-table'})
-		trade_data = trade_table.findAll('input')
-
-		# Copy any existing trade name data
-		for trade_entry in trade_data:
-			if trade_entry['name'] in 'tradename' and len(trade_entry['value'].strip()) < 1 and 'remove_quotes' in plant and plant['remove_quotes']:
-				data[trade_entry['name']] = plant['cleaned_name']
+				data['latin[]'] = lentry['latin']
+				data['latin_status[]'] = lentry['latin_status']
 			else:
-				data[trade_entry['name']] = trade_entry['value']
+				data[f'latin[{param}]'] = lentry['latin']
+				data[f'latin_status[{param}]'] = lentry['latin_status']
 
-		# Cultivars
-		cultivar_table = form.find('table', attrs={'id': 'cultivar-table'})
-		cultivars = cultivar_table.findAll('input')
+		# Common names (excluding any that are the accepted genus)
+		accepted_genera = set()
+		if accepted_name is not None:
+			accepted_genera.add(accepted_name.split(' ')[0].strip().lower())
+		_addCommonNames(tables['common-table'], data, plant, common_names, accepted_genera)
 
-		# Copy any existing cultivars
-		for cultivar in cultivars:
-			data[cultivar['name']] = cultivar['value']
-
-		# Also sold as
-		asa_table = form.find('table', attrs={'id': 'asa-table'})
-		aliases = asa_table.findAll('asa')
-
-		# Copy any existing aliases
-		for alias in aliases:
-			data[alias['name']] = alias['value']
+		# Tradename, series, cultivars and aliases
+		_copyNameFields(tables, data, plant)
 
 		data['submit'] = 'Submit your proposed changes'
 
@@ -940,66 +982,59 @@ class NGA:
 		Expects 'X' to be used to denote crosses."""
 
 		# Make sure we have valid data before continuing
-		if 'parentage_exists' in plant and 'parentage' in plant:
-			if plant['parentage_exists'] or plant['parentage'] is None or plant['parentage']['violates_rules']:
-				return None
+		parentage = plant.get('parentage')
+		if plant.get('parentage_exists', True) or parentage is None or parentage['violates_rules']:
+			return None
 
-			# Prepare the url
-			url = self._plant_data_url % plant['pid']
+		# Prepare the url
+		url = self._plant_data_url % plant['pid']
 
-			try:
-				req = self._session.get(url)
-			except requests.exceptions.RequestException as err:
-				print(f'Error retrieving NGA database databox page for {plant["full_name"]}.')
-				print(str(err))
-				return None
+		try:
+			req = self._session.get(url)
+		except requests.exceptions.RequestException as err:
+			print(f'Error retrieving NGA database databox page for {plant["full_name"]}.')
+			print(str(err))
+			return None
 
-			# Parse the returned HTML
-			soup = BeautifulSoup(req.text, "lxml")
-			form = soup.find('form', attrs={'method': 'post'})
-			data = OrderedDict() # This is crucial. New fields are processed server-side in the order that they are added.
-
-			# Ensure all the existing values are kept
-			table = form.find('table')
-			fields = table.findAll(['input','select'])
-			for field in fields:
-				data[field['name']] = '' # Default is blank
-
-				# Handle checkboxes
-				if 'type' in field.attrs:
-					if field['type'] == 'checkbox' and 'checked' in field.attrs:
-						data[field['name']] = 'on'
-					elif 'value' in field.attrs:
-						data[field['name']] = field['value']
-
-				# Handle dropdown options
-				elif field.name == 'select':
-					for option in field.children:
-						if 'selected' in option.attrs:
-							data[field['name']] = option['value']
-
-			# Locate the parentage field
-			parentage_cell = table.find(string=re.compile('Parentage')) # Due to the fact that this is next to a span, BS4 considers this a text node, so searching for the parent doesn't work in this case
-			if parentage_cell is not None:
-				parentage_field = parentage_cell.parents
-
-				# Walk up through the parents until we hit the TR tag
-				for parent in parentage_field:
-					if parent.name == 'tr':
-						# Locate the input element
-						input_field = parent.find('input')
-						if input_field is not None:
-							# Update the parentage field
-							data[(input_field['name'])] = plant['parentage']['formula']
-							break
+		# Parse the returned HTML
+		tree = _parsePageTree(req.content)
+		if tree is None:
+			return None
 
-			# Normally the page only offers a preview option first, but this value should skip that step
-			data['submit'] = 'Save and submit the proposal'
+		table = tree.xpath('//form[@method="post"]//table')[0]
+		data = {} # Order is crucial; new fields are processed server-side in the order that they are added (dicts preserve insertion order).
 
-			# POST the data and automatically approve the proposal
-			return self._submitProposal(url, data)
+		# Ensure all the existing values are kept (the fields are returned in document order)
+		for field in table.xpath('.//input | .//select'):
+			name = field.get('name')
+			field_type = field.get('type')
 
-		return None
+			# Handle checkboxes and other inputs
+			if field_type is not None:
+				if field_type == 'checkbox' and field.get('checked') is not None:
+					data[name] = 'on'
+				else:
+					data[name] = field.get('value', '') # Default is blank
+
+			# Handle dropdown options
+			elif field.tag == 'select':
+				selected = field.xpath('./option[@selected]')
+				data[name] = selected[-1].get('value') if selected else ''
+
+			else:
+				data[name] = ''
+
+		# Locate the parentage field (the input in the same row as the label)
+		parentage_inputs = table.xpath('.//text()[contains(., "Parentage")]/ancestor::tr[1]//input')
+		if len(parentage_inputs) > 0:
+			# Update the parentage field
+			data[parentage_inputs[0].get('name')] = parentage['formula']
+
+		# Normally the page only offers a preview option first, but this value should skip that step
+		data['submit'] = 'Save and submit the proposal'
+
+		# POST the data and automatically approve the proposal
+		return self._submitProposal(url, data)
 
 
 	def proposeMerge(self, old_plant, new_plant, botanical_names=None, common_names=None, auto_approve=True):
@@ -1067,51 +1102,365 @@ def _generatePlantObject(name, url=None):
 
 	# Extract the plant ID
 	if url is not None:
-		pid = re.search(r'(?:/)(\d+)(?:/)', url, re.DOTALL).group(1)
-		obj['pid'] = int(pid)
+		obj['pid'] = _extractPID(url)
 
 	return obj
 
 
+@lru_cache(maxsize=4096)
+def _absoluteURL(base, url):
+	"""Resolve a link to a plant entry against the website address.
+	Several checks may visit the same plant, so the result is cached."""
+
+	return urljoin(base, url)
+
+
+@lru_cache(maxsize=4096)
+def _extractPID(url):
+	"""Extract the plant ID from the URL of a plant entry."""
+
+	return int(_PID_REGEX.search(url).group(1))
+
+
+@lru_cache(maxsize=4096)
+def _titleCase(text):
+	"""Convert a common name to title case.
+	Many plants share the same common names, so the result is cached."""
+
+	return titlecase(text)
+
+
+def _parsePageTree(content):
+	"""Parse an NGA page with lxml, using the known encoding of the website.
+	Returns None if the page is empty."""
+
+	try:
+		return lxml.html.fromstring(content, parser=_HTML_PARSER)
+	except lxml.etree.ParserError:
+		return None
+
+
+def _readLatinNames(latin_table):
+	"""Read the existing latin names and their statuses from the name proposal form.
+	Returns a dict of {'latin': name, 'latin_status': status} keyed by the id number of each name."""
+
+	lparams = {} # Must be ordered (dicts preserve insertion order)!
+
+	# The fields are returned in document order
+	for i in latin_table.xpath('.//input | .//select'):
+		# Extract the id number for this latin name
+		name = i.get('name')
+		name_id = _NON_DIGIT_REGEX.sub('', name)
+		if name_id not in lparams:
+			lparams[name_id] = {}
+
+		# Get the latin name
+		if 'status' not in name:
+			lparams[name_id]['latin'] = i.get('value')
+
+		# Get the current status of the name
+		else:
+			selector = i.xpath('.//option[@selected]')
+			lparams[name_id]['latin_status'] = selector[0].get('value')
+
+	return lparams
+
+
+def _addCommonNames(common_table, data, plant, common_names, genera):
+	"""Add the existing common names from the name proposal form to the form data, followed by any new common names.
+	Existing common names that match one of the (lowercase) genera or the plant's excluded common name are dropped,
+	as are any new common names that are already present (common_names itself is not modified)."""
+
+	cnames = common_table.findall('.//input')
+
+	cname_exclude = None
+	if 'common_exclude' in plant:
+		cname_exclude = plant['common_exclude'].strip().lower()
+
+	# New common names that haven't been found on the form yet, keyed by their lowercase form
+	remaining = {name.lower(): name for name in common_names or []}
+
+	if len(cnames) > 0:
+		# Read the attributes of each existing common name once
+		existing = [(cname.get('name'), cname.get('value'), cname.get('value').strip().lower()) for cname in cnames]
+		excluded = genera | {cname_exclude}
+
+		# Cycle through the existing common names and ensure they are included
+		# (unless they are the genus)
+		for (cname_field, cname_value, common_tidied) in existing:
+
+			# Check if the common name is already present
+			remaining.pop(common_tidied, None)
+
+			# If the common name isn't the genus, copy it
+			if common_tidied not in excluded:
+				data[cname_field] = cname_value
+
+	# If the provided common name wasn't listed, add it
+	if len(remaining) > 0:
+		data['common[]'] = list(remaining.values())
+
+
+def _copyNameFields(tables, data, plant):
+	"""Copy the existing trade name, series, cultivars and aliases from the name proposal form to the form data."""
+
+	# Copy any existing trade name data
+	for trade_entry in tables['tradename-table'].iter('input'):
+		# Only the trade name itself is filled in from the cleaned name (not any other field in the table)
+		if trade_entry.get('name') == 'tradename' and len(trade_entry.get('value').strip()) < 1 and 'remove_quotes' in plant and plant['remove_quotes']:
+			data[trade_entry.get('name')] = plant['cleaned_name']
+		else:
+			data[trade_entry.get('name')] = trade_entry.get('value')
+
+	# Copy any existing cultivars
+	for cultivar in tables['cultivar-table'].iter('input'):
+		data[cultivar.get('name')] = cultivar.get('value')
+
+	# Copy any existing aliases
+	for alias in tables['asa-table'].iter('asa'):
+		data[alias.get('name')] = alias.get('value')
+
+
+def _scanResponse(req, tests, fallback_tests=()):
+	"""Parse a streamed response until an element passes one of the tests, without reading the rest of the page.
+	Returns the first matching element, or None if there is no match.
+	Elements passing one of the fallback tests don't stop the scan; the first of these is returned if nothing passes the tests."""
+
+	parser = lxml.etree.HTMLPullParser(events=('start',), encoding=_NGA_ENCODING)
+	fallback = None
+
+	def scanEvents():
+		"""Check the elements parsed so far, returning the first element that passes one of the tests."""
+
+		nonlocal fallback
+		for (_, element) in parser.read_events():
+			if any(test(element) for test in tests):
+				return element
+			if fallback is None and any(test(element) for test in fallback_tests):
+				fallback = element
+		return None
+
+	for chunk in req.iter_content(8192):
+		parser.feed(chunk)
+		match = scanEvents()
+		if match is not None:
+			return match
+
+	# Check any elements remaining at the end of the page
+	try:
+		parser.close()
+	except lxml.etree.XMLSyntaxError:
+		return fallback
+
+	match = scanEvents()
+	return match if match is not None else fallback
+
+
+def _hasClass(element, tag, css_class):
+	"""Check if an element is of the given type and has the given class."""
+
+	return element.tag == tag and css_class in element.get('class', '').split()
+
+
+def _isApproveLink(element):
+	"""Check if an element is the link used to approve a submitted proposal."""
+
+	return element.tag == 'a' and _APPROVE_REGEX.search(element.get('href', '')) is not None
+
+
+def _isViewLink(element):
+	"""Check if an element is a link to a plant entry."""
+
+	return element.tag == 'a' and _VIEW_REGEX.search(element.get('href', '')) is not None
+
+
+def _isFailureAlert(element):
+	"""Check if an element is the alert shown when a proposal fails."""
+
+	return _hasClass(element, 'div', 'alert-danger')
+
+
+def _isSuccessAlert(element):
+	"""Check if an element is the alert shown when a proposal is approved."""
+
+	return _hasClass(element, 'div', 'alert-success')
+
+
+def _parseSearchResults(content):
+	"""Extract the rows of the results table on an NGA search page, using selectolax if it is available.
+	Returns None if there are no search results."""
+
+	# If there are search results, then the caption will exist
+	if SELECTOLAX_EXISTS:
+		tree = LexborHTMLParser(content)
+		captions = [caption for caption in tree.css('caption') if caption.text() == 'Search Results']
+		if len(captions) > 0:
+			return [_parseTableRowSelectolax(row) for row in _selectDataRows(captions[0].parent)]
+
+	else:
+		tree = _parsePageTree(content)
+		captions = tree.xpath('//caption[.="Search Results"]') if tree is not None else []
+		if len(captions) > 0:
+			return [_parseTableRow(row) for row in captions[0].getparent().xpath('.//tr[not(.//th)]')]
+
+	return None
+
+
+def _strippedStrings(element):
+	"""Return the non-empty text nodes within an element, stripped of whitespace (like Beautiful Soup's stripped_strings)."""
+
+	return [text.strip() for text in element.xpath('.//text()') if text.strip()]
+
+
+def _selectDataRows(table):
+	"""Select the rows of a selectolax table that aren't header rows (i.e. the equivalent of tr[not(.//th)])."""
+
+	return [row for row in table.css('tr') if row.css_first('th') is None]
+
+
+def _readCachedPage(cpath):
+	"""Parse a genus page stored in the cache. Returns None if the page is empty."""
+
+	with gzip.open(cpath, 'rb') as file_desc:
+		return _parsePageContent(file_desc.read())
+
+
+def _parsePageContent(content):
+	"""Parse the HTML of a genus page, using selectolax if it is available.
+	Returns None if the page is empty."""
+
+	if SELECTOLAX_EXISTS:
+		return LexborHTMLParser(content)
+
+	try:
+		return lxml.html.fromstring(content)
+	except lxml.etree.ParserError:
+		return None
+
+
+def _parsePagination(page_tree):
+	"""Determine the offset increment and number of pages from the first page of a genus.
+	The increment will be None if there is only one page."""
+
+	increment = None
+	npages = 1
+
+	if page_tree is None:
+		links = []
+	elif SELECTOLAX_EXISTS:
+		links = [(page.text(), page.attributes.get('href') or '') for page in page_tree.css('.page-link')]
+	else:
+		links = [(page.text_content(), page.get('href', '')) for page in page_tree.find_class('page-link')]
+
+	for (pgnum, pghref) in links:
+		pgurl = urlparse(pghref) # Parse the URL
+		pgquery = parse_qs(pgurl.query)
+		if 'offset' in pgquery:
+			pgoffset = pgquery['offset'][0] # Extract the offset
+
+			try:
+				# Extract the offset (based on the link to page 2)
+				num = int(pgnum)
+				offset = int(pgoffset)
+				if num == 2:
+					increment = offset
+
+				# Get the number of pages (look for the highest number)
+				npages = max(npages, num)
+
+			except ValueError:
+				pass
+
+	return (increment, npages)
+
+
 def _parseTableRow(row, cname_exclude=None):
 	"""Extract the plant information from a row in the NGA genus or search results table."""
 
+	# Parent entries have no italicised botanic name, so skip them before doing any other work
+	if row.find('.//i') is None:
+		return (None, None, None)
+
 	# Extract the second column, as this contains the entry name
-	entry = row.findAll('td')[1]
+	entry = row.findall('.//td')[1]
 
 	# Link to the plant entry on the website
-	anchor = entry.find('a')
+	anchor = entry.find('.//a')
 	if anchor is None:
 		# Empty row?
 		return (None, None, None)
 
-	entry_link = anchor['href']
-	anchor_text = anchor.text
+	entry_link = anchor.get('href')
+	anchor_text = anchor.text_content()
+
+	italics = entry.find('.//i')
+	if italics is None:
+		# This was probably a parent entry
+		return (None, None, None)
+
+	# Check if there is a common name (i.e. the text immediately before the italics)
+	previous = italics.getprevious()
+	if previous is None:
+		commonname = italics.getparent().text
+	else:
+		commonname = previous.tail
+
+	return _buildTableRow(entry_link, anchor_text, italics.text_content(), commonname, cname_exclude)
+
+
+def _parseTableRowSelectolax(row, cname_exclude=None):
+	"""Extract the plant information from a selectolax row in the NGA genus table."""
+
+	# Parent entries have no italicised botanic name, so skip them before doing any other work
+	if row.css_first('i') is None:
+		return (None, None, None)
+
+	# Extract the second column, as this contains the entry name
+	entry = row.css('td')[1]
+
+	# Link to the plant entry on the website
+	anchor = entry.css_first('a')
+	if anchor is None:
+		# Empty row?
+		return (None, None, None)
+
+	italics = entry.css_first('i')
+	if italics is None:
+		# This was probably a parent entry
+		return (None, None, None)
+
+	# Check if there is a common name (i.e. the text node immediately before the italics)
+	previous = italics.prev
+	if previous is not None and previous.tag == '-text':
+		commonname = previous.text()
+	else:
+		commonname = None
+
+	return _buildTableRow(anchor.attributes.get('href'), anchor.text(), italics.text(), commonname, cname_exclude)
+
+
+def _buildTableRow(entry_link, anchor_text, botanic_name, commonname, cname_exclude=None):
+	"""Generate the botanic name, cultivar name and plant object for a row in an NGA table."""
 
 	# Name components
 	# If an entry has a common name, the botanic name and cultivar will be in parentheses
 	if '(' in anchor_text:
-		regex = r'(?:\()(.+)(?:\))'
 		try:
-			entry_name = re.search(regex, anchor_text, re.DOTALL).group(1) # Remember to use group 1 here
+			entry_name = _PARENTHESES_REGEX.search(anchor_text).group(1) # Remember to use group 1 here
 		except AttributeError:
 			print('\nERROR: Invalid anchor text -', anchor_text)
 			sys.exit(1)
 	else:
 		entry_name = anchor_text
 
-	italics = entry.find('i')
-	if italics is None:
-		# This was probably a parent entry
-		return (None, None, None)
-
-	botanic_name = italics.text # Botanical part
 	genus = botanic_name.split()[0]
-	cultivar_name = entry_name.replace(botanic_name, '').strip() # Cultivar
+	# Cultivar (the botanic name is normally a prefix of the entry name, so avoid searching the whole string)
+	if entry_name.startswith(botanic_name):
+		cultivar_name = entry_name[len(botanic_name):].strip()
+	else:
+		cultivar_name = entry_name.replace(botanic_name, '').strip()
 	plant_data = _generatePlantObject(entry_name, entry_link)
 
-	# Check if there is a common name
-	commonname = italics.previousSibling
 	if commonname is not None:
 		commonname = commonname.strip().strip('(').strip()
 		if commonname == genus:
@@ -1130,44 +1479,6 @@ def formatParentage(genus, dataset):
 	Current database rules do not permit the use of parentage fields containing
 	different genera unless the parent is a species."""
 
-	def checkUnknown(parent):
-		"""Method to check if the parentage provided is unknown."""
-
-		# List of strings used to describe unknown parents
-		unknown_list = ['na','uk','?','unknown']
-
-		# Convert to lowercase and clean up
-		genus = parent[0].lower().strip()
-		taxon = parent[1].lower().strip()
-
-		# Return true if either the genus or species/hybrid taxon is unknown
-		return genus in unknown_list or taxon in unknown_list
-
-	def checkIfSpecies(genus, parent):
-		"""Method to check if the parent is a species or hybrid."""
-
-		# Check if the parent is in the same genus as the hybrid
-		different_genus = (genus != parent[0])
-
-		# Check if is lowercase (and possibly symbols); i.e. a species
-		species = all(namepart.islower() or not namepart.isalpha() for namepart in parent[1])
-
-		if species or different_genus:
-			name = ' '.join(parent)
-		else:
-			name = parent[1]
-
-		return (different_genus, species, name)
-
-	def checkIfNaturalHybrid(parent):
-		"""Method to check if an entry is a natural hybrid
-		(i.e. contains the multiplication symbol). If so,
-		substitute for x to be consistent with the database."""
-
-		# TO DO: Check for the presence of symbols
-		return parent
-
-
 	# Make sure the fields are present
 	if 'pod_parent' in dataset and 'pollen_parent' in dataset:
 		pod_parent = dataset['pod_parent']
@@ -1177,19 +1488,19 @@ def formatParentage(genus, dataset):
 		if pod_parent is not None and pollen_parent is not None:
 
 			# Check if unknown
-			unk_mother = checkUnknown(pod_parent)
-			unk_father = checkUnknown(pollen_parent)
+			unk_mother = _checkUnknown(pod_parent[0], pod_parent[1])
+			unk_father = _checkUnknown(pollen_parent[0], pollen_parent[1])
 
 			# If both parents are unknown, abort
 			if unk_mother and unk_father:
 				return None
 
 			# Check if species (if so, we need the genus included)
-			mother = checkIfSpecies(genus, pod_parent)
-			father = checkIfSpecies(genus, pollen_parent)
+			mother = _checkIfSpecies(genus, pod_parent[0], pod_parent[1])
+			father = _checkIfSpecies(genus, pollen_parent[0], pollen_parent[1])
 
-			mother = checkIfNaturalHybrid(mother)
-			father = checkIfNaturalHybrid(father)
+			mother = _checkIfNaturalHybrid(mother)
+			father = _checkIfNaturalHybrid(father)
 
 			parentage = {
 				'formula': ' X '.join([mother[2], father[2]]),
@@ -1202,6 +1513,47 @@ def formatParentage(genus, dataset):
 	return None
 
 
+# The same parents recur across many hybrids in a genus, so the parent checks are cached
+@lru_cache(maxsize=4096)
+def _checkUnknown(parent_genus, parent_taxon):
+	"""Check if the parentage provided is unknown."""
+
+	# Convert to lowercase and clean up
+	parent_genus = parent_genus.lower().strip()
+	parent_taxon = parent_taxon.lower().strip()
+
+	# Return true if either the genus or species/hybrid taxon is unknown
+	return parent_genus in _UNKNOWN_PARENTS or parent_taxon in _UNKNOWN_PARENTS
+
+
+@lru_cache(maxsize=4096)
+def _checkIfSpecies(genus, parent_genus, parent_taxon):
+	"""Check if the parent is a species or hybrid."""
+
+	# Check if the parent is in the same genus as the hybrid
+	different_genus = (genus != parent_genus)
+
+	# Check if is lowercase (and possibly symbols); i.e. a species
+	# islower() requires at least one cased character, so names made up only of symbols need a separate check
+	species = parent_taxon.islower() or not any(map(str.isalpha, parent_taxon))
+
+	if species or different_genus:
+		name = f'{parent_genus} {parent_taxon}'
+	else:
+		name = parent_taxon
+
+	return (different_genus, species, name)
+
+
+def _checkIfNaturalHybrid(parent):
+	"""Check if an entry is a natural hybrid
+	(i.e. contains the multiplication symbol). If so,
+	substitute for x to be consistent with the database."""
+
+	# TO DO: Check for the presence of symbols
+	return parent
+
+
 def checkNewProposal(pending, botanic_name):
 	"""Check to see if a new plant proposal exists. Requires admin rights."""
 
@@ -9,9 +9,30 @@ This script is designed for Python 3 and Beautiful Soup 4 with the lxml parser."
 # Module imports
 import sqlite3
 import re
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.etree
+import lxml.html
+from bs4 import UnicodeDammit
+try:
+	from selectolax.lexbor import LexborHTMLParser
+	SELECTOLAX_EXISTS = True
+except ImportError:
+	SELECTOLAX_EXISTS = False
+
+_UID_REGEX = re.compile(r'\d+') # RHS ID number in a grex URL
+
+# Substitutions between the parentheses used by the RHS and the brackets used in the cache (and NGA parentage fields)
+_TO_BRACKETS = str.maketrans('()', '[]')
+_TO_PARENTHESES = str.maketrans('[]', '()')
+
+# RHS pages are decoded before parsing, so one parser can be shared by all of them
+# (lxml serialises the use of a parser between threads)
+_HTML_PARSER = lxml.html.HTMLParser()
 
 
 class Register:
@@ -25,20 +46,52 @@ class Register:
 		self._parentage_url = 'https://apps.rhs.org.uk/horticulturaldatabase/orchidregister/parentageresults.asp'
 		self._dbconn = None
 		self._columns = None
+		self._insert_sql = None
+		self._upsert_invalid_sql = None
+		self._default_dataset = None
+		self._grex_cache = {} # Registrations retrieved from the website, keyed by URL
 
-		self._session = requests.Session()
-		self._session.get(self._search_url)
 		self._max_attempts = 5
+		self._max_workers = 4 # Number of search result pages to fetch concurrently
+
+		# Keep enough connections for the concurrent page fetches, and retry failed connections and server errors with a backoff
+		retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+		self._session = requests.Session()
+		self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self._max_workers, max_retries=retries))
+		self._session_started = False # The session is set up on the first request to the website, as cached results don't need it
+
+
+	def _startSession(self):
+		"""Visit the search page to set up the session, unless this has already been done.
+		Raises a requests exception if the request fails."""
+
+		if not self._session_started:
+			self._session.get(self._search_url)
+			self._session_started = True
 
 
 	def dbConnect(self, dbpath):
 		"""Initialise a SQLite DB for use with the cache."""
 
 		self._dbconn = sqlite3.connect(dbpath)
+
+		# Each cached entry is committed straight away, so use write-ahead logging to avoid a sync to disk on every commit
+		# (an interrupted run may lose the last few entries, but the cache will never be corrupted)
+		self._dbconn.execute('PRAGMA journal_mode=WAL')
+		self._dbconn.execute('PRAGMA synchronous=NORMAL')
+
 		self._columns = ['uid','genus','epithet','synonym_genus','synonym_epithet',
 			'registrant_name','originator_name','date_of_registration',
 			'pod_parent_genus','pod_parent_epithet','pollen_parent_genus','pollen_parent_epithet']
 
+		# Since the ID is the primary key, if there is a conflict only that row should be replaced
+		self._insert_sql = f'''INSERT OR REPLACE INTO registrations({', '.join(self._columns)}) VALUES ({', '.join([f':{x}' for x in self._columns])})'''
+		self._default_dataset = dict.fromkeys(self._columns, '') # Columns missing from an entry are left empty
+
+		# Add an invalid search, or count another attempt if it is already recorded
+		self._upsert_invalid_sql = '''INSERT INTO invalid(genus, grex, attempts) VALUES (?, ?, 1) ON CONFLICT(genus, grex) DO UPDATE SET attempts=attempts+1'''
+
+		# Create the tables and indexes if needed (DDL statements are committed by executescript itself)
 		sql = '''CREATE TABLE IF NOT EXISTS registrations(
 			uid INTEGER PRIMARY KEY,
 			genus TEXT,
@@ -51,19 +104,19 @@ class Register:
 			pod_parent_genus TEXT,
 			pod_parent_epithet TEXT,
 			pollen_parent_genus TEXT,
-			pollen_parent_epithet TEXT);'''
+			pollen_parent_epithet TEXT);
 
-		self._dbconn.execute(sql)
-		self._dbconn.commit()
+			-- Registrations are looked up by name and by parentage rather than by ID, so index both
+			CREATE INDEX IF NOT EXISTS registrations_name ON registrations(genus, epithet);
+			CREATE INDEX IF NOT EXISTS registrations_parentage ON registrations(pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet);
 
-		sql = '''CREATE TABLE IF NOT EXISTS invalid(
+			CREATE TABLE IF NOT EXISTS invalid(
 			genus TEXT,
 			grex TEXT,
 			attempts INTEGER,
 			PRIMARY KEY(genus, grex));'''
 
-		self._dbconn.execute(sql)
-		self._dbconn.commit()
+		self._dbconn.executescript(sql)
 
 
 	def dbClose(self):
@@ -71,203 +124,201 @@ class Register:
 
 		if self._dbconn:
 			self._dbconn.commit()
+			self._dbconn.execute('PRAGMA optimize') # Update the query planner statistics if needed
 			self._dbconn.close()
 
 
 	def _getGrex(self, url):
-		"""Given a RHS URL, retrieve the RHS entry from the website."""
+		"""Given a RHS URL, retrieve the RHS entry from the website.
+		Entries are only retrieved once per instance, as the same registration can match several searches."""
+
+		if url in self._grex_cache:
+			return dict(self._grex_cache[url])
 
 		try:
+			self._startSession()
 			req = self._session.get(url)
 		except requests.exceptions.RequestException:
 			print("Unable to retrieve RHS entry.")
 			return None
 
-		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		tables = soup.findAll('table', {'class':'results'})
+		# Parse the returned HTML (detecting the encoding the same way that Beautiful Soup does)
+		try:
+			tree = lxml.html.fromstring(UnicodeDammit(req.content, is_html=True).unicode_markup, parser=_HTML_PARSER)
+		except lxml.etree.ParserError:
+			# Empty page
+			return None
+		tables = tree.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " results ")]')
 		grex = {}
 
 		if len(tables) == 2:
 			# Process the first table containing the epithet and registration info
-			entry = tables[0]
-			rows = entry.findAll('tr')
-
-			# Iterate through the rows of the table
 			# First column should be the field name and second is the value
-			for row in rows:
-				cells = row.findAll('td')
-				grex[cells[0].text] = cells[1].text.replace('  ',' ')
+			for row in tables[0].iter('tr'):
+				cells = row.findall('.//td')
+				grex[cells[0].text_content()] = cells[1].text_content().replace('  ',' ')
 
 			# Process the second table containing the parentage information
-			parentage = tables[1]
-			tbody = parentage.find('tbody')
-			rows = tbody.findAll('tr')
-
-			# Iterate through the rows of the table
 			# First column is the field name, second is the pod parent info and third is the pollen parent info
-			for row in rows:
-				fieldname = row.find('th')
-				fieldvalues = row.findAll('td')
-				grex[f'Pod Parent {fieldname.text}'] = fieldvalues[0].text.replace('{var}','var.').replace('{subsp}','subsp.').replace('(','[').replace(')',']')
-				grex[f'Pollen Parent {fieldname.text}'] = fieldvalues[1].text.replace('{var}','var.').replace('{subsp}','subsp.').replace('(','[').replace(')',']')
+			for row in tables[1].find('.//tbody').iter('tr'):
+				fieldname = row.find('.//th').text_content()
+				fieldvalues = [cell.text_content().replace('{var}','var.').replace('{subsp}','subsp.').translate(_TO_BRACKETS) for cell in row.findall('.//td')]
+				grex[f'Pod Parent {fieldname}'] = fieldvalues[0]
+				grex[f'Pollen Parent {fieldname}'] = fieldvalues[1]
 
 			# Finally, extract the RHS ID number from the URL
-			matches = re.findall(r'\d+', url)
-			if matches is not None and len(matches) > 0:
-				grex['uid'] = int(matches[0])
+			matches = _UID_REGEX.search(url)
+			if matches is not None:
+				grex['uid'] = int(matches.group())
 
+			self._grex_cache[url] = dict(grex)
 			return grex
 
 		return None
 
 
-	def cacheGrex(self, url):
-		"""Given a RHS URL, cache the entry in the database."""
+	def _grexDataset(self, url):
+		"""Given a RHS URL, retrieve the entry and format it as a row of the registrations table.
+		Returns None if the entry could not be retrieved."""
 
-		if self._dbconn is not None:
-			grex = self._getGrex(url)
+		grex = self._getGrex(url)
+
+		# If we have a response, we need to parse it so that it can be inserted into the database
+		if grex is not None and 'uid' in grex:
+			dataset = self._default_dataset.copy()
+			dataset.update((_columnName(key), value) for (key, value) in grex.items())
+			return dataset
 
-			# If we have a response, we need to parse it and insert it into the database
-			if grex is not None and 'uid' in grex:
-				dataset = {}
+		return None
 
-				# Format the column names
-				for key in grex:
-					newkey = key.lower().replace(' ','_')
-					dataset[newkey] = grex[key]
 
-				# Make sure all necessary columns are present
-				for column in self._columns:
-					if column not in dataset:
-						dataset[column] = ''
+	def cacheGrex(self, url):
+		"""Given a RHS URL, cache the entry in the database."""
 
-				# Insert this into the database
-				# Since the ID is the primary key, if there is a conflict only that row should be replaced
-				sql = f'''INSERT OR REPLACE INTO registrations({', '.join(self._columns)}) VALUES ({', '.join([f':{x}' for x in self._columns])})'''
-				self._dbconn.execute(sql, dataset)
-				self._dbconn.commit()
+		return self.cacheGrexes([url])[0]
 
-				return dataset
 
-		else:
+	def cacheGrexes(self, urls):
+		"""Given a list of RHS URLs, cache the entries in the database in a single transaction.
+		Returns the cached entries in the same order (None for any entry that could not be retrieved)."""
+
+		if self._dbconn is None:
 			print("No active connection to the SQLite database.")
+			return [None] * len(urls)
 
-		return None
+		# Fetch the entries concurrently; the session's connection pool is sized to the number of workers
+		if len(urls) > 1:
+			with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+				datasets = list(executor.map(self._grexDataset, urls))
+		else:
+			datasets = [self._grexDataset(url) for url in urls]
+
+		# Insert these into the database
+		self._dbconn.executemany(self._insert_sql, [dataset for dataset in datasets if dataset is not None])
+		self._dbconn.commit()
+
+		return datasets
 
 
 	def cacheInvalidSearch(self, genus, grex):
 		"""Record invalid search terms so that we don't need to keep hitting the RHS database."""
 
 		if self._dbconn is not None:
-
-			# Check if there is an existing entry in the database
-			sql = '''SELECT attempts FROM invalid WHERE genus=? AND grex=?'''
-			cur = self._dbconn.execute(sql, (genus, grex))
-			results = cur.fetchall()
-
-			if results is not None and len(results) > 0:
-				attempts = results[0][0] + 1
-			else:
-				attempts = 1
-
-			# Update the database
-			sql = '''INSERT OR REPLACE INTO invalid(genus, grex, attempts) VALUES (?, ?, ?)'''
-			self._dbconn.execute(sql, (genus, grex, attempts))
+			self._dbconn.execute(self._upsert_invalid_sql, (genus, grex))
 			self._dbconn.commit()
 
 		else:
 			print("No active connection to the SQLite database.")
 
 
-	def _parseSearchResults(self, soup, results, genus=None):
-		"""Parse a result page from the RHS search."""
-
-		rows = soup.findAll('tr')
+	def _parseSearchResults(self, rows, results, genus=None):
+		"""Parse the result rows (from _parseSearchPage) of a page from the RHS search."""
 
 		# For each row in the table of results, looking for hybrid entries
 		page_genus = None
-		for row in rows:
-			cells = row.findAll('td')
-			if len(cells) == 2:
-				# Check what genus the result entry belongs to
-				result_grex = cells[0].text.strip()
-				if len(result_grex) > 0:
-					page_genus = result_grex
-				hybrid = cells[1]
+		for (result_grex, name, relpath) in rows:
+			# Check what genus the result entry belongs to
+			result_grex = result_grex.strip()
+			if len(result_grex) > 0:
+				page_genus = result_grex
 
-				# Tidy up the name
-				name = hybrid.text.strip() # Some RHS entries have extraneous whitespace
-				name = name.replace('(','[').replace(')',']')
+			# Tidy up the name
+			name = name.strip() # Some RHS entries have extraneous whitespace
+			name = name.translate(_TO_BRACKETS)
 
-				# If the resultant grex is in the correct genus
-				if (genus is None) or (page_genus in genus):
-					relpath = hybrid.find('a')['href']
-					results['matches'][name] = {'url': urljoin(self._search_url, relpath), 'genus': page_genus}
+			# If the resultant grex is in the correct genus
+			if relpath is not None and ((genus is None) or (page_genus in genus)):
+				results['matches'][name] = {'url': urljoin(self._search_url, relpath), 'genus': page_genus}
 
 		return results
 
 
+	def _fetchSearchRows(self, url):
+		"""Retrieve a page of RHS search results and extract the result rows.
+		Raises a requests exception if the request fails."""
+
+		req = self._session.get(url)
+		(rows, _) = _parseSearchPage(req.content)
+		return rows
+
+
 	def search(self, genus, grex, force=False):
 		"""Search the register for a registration matching
 		the supplied genus and grex names."""
 
 		# Create the URL parameters object
-		db_params = {'genus': genus, 'grex': grex.replace('(','[').replace(')',']')} # Substitute any parentheses in the grex for brackets
-		url_params = {'genus': genus, 'grex': grex.replace('[','(').replace(']',')')} # Substitute any brackets in the grex for parentheses
+		db_params = {'genus': genus, 'grex': grex.translate(_TO_BRACKETS)} # Substitute any parentheses in the grex for brackets
+		url_params = {'genus': genus, 'grex': grex.translate(_TO_PARENTHESES)} # Substitute any brackets in the grex for parentheses
 
 		# First check to see if this entry is currently in the database cache
 		if self._dbconn is not None and not force:
-			sql = '''SELECT genus, epithet, pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet FROM registrations WHERE genus=:genus AND epithet=:grex'''
-			cur = self._dbconn.execute(sql, db_params)
-			rows = cur.fetchall()
-
-			if rows is not None and len(rows) > 0:
-				return {'matched':True, 'matches':None, 'source':'db', 'pod_parent':(rows[0][2], rows[0][3]), 'pollen_parent':(rows[0][4], rows[0][5])}
-
-			# If this isn't registered and the number of search attempts exceeds the maximum, abort the attempt
-			sql = '''SELECT genus, grex, attempts FROM invalid WHERE genus=:genus AND grex=:grex'''
-			cur = self._dbconn.execute(sql, db_params)
-			rows = cur.fetchall()
-
-			if rows is not None and len(rows) > 0:
-				attempts = rows[0][2]
+			# Look up both the registrations and the invalid searches at once (a registration takes precedence)
+			sql = '''SELECT 0, pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet, NULL FROM registrations WHERE genus=:genus AND epithet=:grex
+				UNION ALL SELECT 1, NULL, NULL, NULL, NULL, attempts FROM invalid WHERE genus=:genus AND grex=:grex
+				ORDER BY 1 LIMIT 1'''
+			row = self._dbconn.execute(sql, db_params).fetchone()
+
+			if row is not None:
+				if row[0] == 0:
+					return {'matched':True, 'matches':None, 'source':'db', 'pod_parent':(row[1], row[2]), 'pollen_parent':(row[3], row[4])}
+
+				# If this isn't registered and the number of search attempts exceeds the maximum, abort the attempt
+				attempts = row[5]
 				if attempts >= self._max_attempts:
 					return {'matched':False, 'matches':None, 'source':'db', 'pod_parent':None, 'pollen_parent':None}
 
 		try:
+			self._startSession()
 			req = self._session.get(self._search_url, params=url_params)
 		except requests.exceptions.RequestException:
 			return None
 
 		# Parse the returned HTML
-		soup = BeautifulSoup(req.text, "lxml")
-		page_nav = soup.find('div', {'class':'pagination'})
+		(rows, page_links) = _parseSearchPage(req.content)
 
 		# The first page
 		results = {'matched':False, 'matches':{}, 'source':'web', 'pod_parent':None, 'pollen_parent':None}
-		results = self._parseSearchResults(soup, results, genus)
+		results = self._parseSearchResults(rows, results, genus)
 		results['matched'] = grex in results['matches']
 
-		# If it's not matched and there are more pages, fetch those, too
-		if not results['matched']  and page_nav is not None:
-			pages = page_nav.findAll('li')
-			for page in pages:
-				anchor = page.find('a')
-				if anchor is not None: # The first page won't have a link
-					link = anchor['href']
-
-					try:
-						req = self._session.get(urljoin(self._search_url, link))
-					except requests.exceptions.RequestException:
-						return None
-
-					# Parse the returned HTML
-					soup = BeautifulSoup(req.text, "lxml")
-					results = self._parseSearchResults(soup, results, genus)
-					results['matched'] = grex in results['matches']
-					if results['matched']:
-						break # No need to keep looping
+		# If it's not matched and there are more pages, fetch those, too (the first page won't have a link)
+		if not results['matched'] and len(page_links) > 0:
+			with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+				pages = [executor.submit(self._fetchSearchRows, urljoin(self._search_url, link)) for link in page_links]
+
+				# Merge the pages in order, so that the results are the same as fetching them one at a time
+				try:
+					for page in pages:
+						results = self._parseSearchResults(page.result(), results, genus)
+						results['matched'] = grex in results['matches']
+						if results['matched']:
+							break # No need to keep looping
+				except requests.exceptions.RequestException:
+					return None
+				finally:
+					# Don't fetch any pages that are no longer needed
+					for page in pages:
+						page.cancel()
 
 		# Automatically cache results
 		if self._dbconn is not None:
@@ -292,43 +343,42 @@ class Register:
 
 			# Parentage search using original order
 			try:
+				self._startSession()
 				req = self._session.get(self._parentage_url, params=url_params)
 			except requests.exceptions.RequestException:
 				return None
 
 			# Parse the returned HTML
-			soup = BeautifulSoup(req.text, "lxml")
+			(rows, _) = _parseSearchPage(req.content)
 
 			# The first page (there should not be multiple when searching based on parentage!)
 			results = {'matched':False, 'matches':{}, 'parents_reversed':reversed_parents, 'source':'web', 'genus':None, 'epithet':None}
-			results = self._parseSearchResults(soup, results, expected_genus)
+			results = self._parseSearchResults(rows, results, expected_genus)
 			return results
 
 
 		# Create the URL parameters object
-		db_params = {'pod_parent_genus': pod_parent_genus, 'pod_parent': pod_parent_grex.replace('(','[').replace(')',']'),
-			'pollen_parent_genus': pollen_parent_genus, 'pollen_parent': pollen_parent_grex.replace('(','[').replace(')',']')} # Substitute any parentheses in the grex for brackets
-		url_params = {'seedgen': pod_parent_genus, 'seedgrex': pod_parent_grex.replace('[','(').replace(']',')'),
-			'pollgen': pollen_parent_genus, 'pollgrex': pollen_parent_grex.replace('[','(').replace(']',')'), '#':''} # Substitute any brackets in the grex for parentheses
+		db_params = {'pod_parent_genus': pod_parent_genus, 'pod_parent': pod_parent_grex.translate(_TO_BRACKETS),
+			'pollen_parent_genus': pollen_parent_genus, 'pollen_parent': pollen_parent_grex.translate(_TO_BRACKETS)} # Substitute any parentheses in the grex for brackets
+		url_params = {'seedgen': pod_parent_genus, 'seedgrex': pod_parent_grex.translate(_TO_PARENTHESES),
+			'pollgen': pollen_parent_genus, 'pollgrex': pollen_parent_grex.translate(_TO_PARENTHESES), '#':''} # Substitute any brackets in the grex for parentheses
 		reversed_url_params = {'seedgen': url_params['pollgen'], 'seedgrex': url_params['pollgrex'],
 			'pollgen': url_params['seedgen'], 'pollgrex': url_params['seedgrex'], '#':''}
 
 		# First check to see if this entry is currently in the database cache
 		if self._dbconn is not None and not force:
-			sql = '''SELECT genus, epithet, pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet FROM registrations WHERE pod_parent_genus=:pod_parent_genus AND pod_parent_epithet=:pod_parent AND pollen_parent_genus=:pollen_parent_genus AND pollen_parent_epithet=:pollen_parent'''
-			cur = self._dbconn.execute(sql, db_params)
-			rows = cur.fetchall()
+			sql = '''SELECT genus, epithet, pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet FROM registrations WHERE pod_parent_genus=:pod_parent_genus AND pod_parent_epithet=:pod_parent AND pollen_parent_genus=:pollen_parent_genus AND pollen_parent_epithet=:pollen_parent LIMIT 1'''
+			row = self._dbconn.execute(sql, db_params).fetchone()
 
-			if rows is not None and len(rows) > 0:
-				return {'matched':True, 'parents_reversed':False, 'source':'db', 'genus':rows[0][0], 'epithet':rows[0][1]}
+			if row is not None:
+				return {'matched':True, 'parents_reversed':False, 'source':'db', 'genus':row[0], 'epithet':row[1]}
 
 			if check_reverse:
-				sql = '''SELECT genus, epithet, pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet FROM registrations WHERE pod_parent_genus=:pollen_parent_genus AND pod_parent_epithet=:pollen_parent AND pollen_parent_genus=:pod_parent_genus AND pollen_parent_epithet=:pod_parent'''
-				cur = self._dbconn.execute(sql, db_params)
-				rows = cur.fetchall()
+				sql = '''SELECT genus, epithet, pod_parent_genus, pod_parent_epithet, pollen_parent_genus, pollen_parent_epithet FROM registrations WHERE pod_parent_genus=:pollen_parent_genus AND pod_parent_epithet=:pollen_parent AND pollen_parent_genus=:pod_parent_genus AND pollen_parent_epithet=:pod_parent LIMIT 1'''
+				row = self._dbconn.execute(sql, db_params).fetchone()
 
-				if rows is not None and len(rows) > 0:
-					return {'matched':True, 'parents_reversed':True, 'source':'db', 'genus':rows[0][0], 'epithet':rows[0][1]}
+				if row is not None:
+					return {'matched':True, 'parents_reversed':True, 'source':'db', 'genus':row[0], 'epithet':row[1]}
 
 		# Determine expected genus
 		if pod_parent_genus == pollen_parent_genus:
@@ -342,10 +392,9 @@ class Register:
 		if matches > 1:
 			datasets = []
 
-			# Iterate through all the results
-			for grex in results['matches']:
-				if self._dbconn is not None:
-					dataset = self.cacheGrex(results['matches'][grex]['url'])
+			# Cache all the results at once
+			if self._dbconn is not None:
+				for dataset in self.cacheGrexes([match['url'] for match in results['matches'].values()]):
 					if dataset is not None and 'not' in dataset['synonym_flag']:
 						datasets.append(dataset)
 
@@ -380,10 +429,9 @@ class Register:
 			if matches > 1:
 				datasets = []
 
-				# Iterate through all the results
-				for grex in results['matches']:
-					if self._dbconn is not None:
-						dataset = self.cacheGrex(results['matches'][grex]['url'])
+				# Cache all the results at once
+				if self._dbconn is not None:
+					for dataset in self.cacheGrexes([match['url'] for match in results['matches'].values()]):
 						if dataset is not None and 'not' in dataset['synonym_flag']:
 							datasets.append(dataset)
 
@@ -409,6 +457,63 @@ class Register:
 		return results
 
 
+@lru_cache(maxsize=None)
+def _columnName(field_name):
+	"""Convert the name of a field on a RHS registration page to the name of a database column.
+	There are only a few dozen distinct field names, so the conversions are cached."""
+
+	return field_name.lower().replace(' ','_')
+
+
+def _parseSearchPage(content):
+	"""Extract the result rows and the links to any further pages from a RHS search page, using selectolax if it is available.
+	Returns a list of (genus, name, link) tuples for the rows with two cells, and a list of page links."""
+
+	rows = []
+	page_links = []
+
+	# Detect the encoding the same way that Beautiful Soup does
+	markup = UnicodeDammit(content, is_html=True).unicode_markup
+
+	if SELECTOLAX_EXISTS:
+		tree = LexborHTMLParser(markup)
+
+		for row in tree.css('tr'):
+			cells = row.css('td')
+			if len(cells) == 2:
+				anchor = cells[1].css_first('a')
+				rows.append((cells[0].text(), cells[1].text(), anchor.attributes.get('href') if anchor is not None else None))
+
+		page_nav = tree.css_first('div.pagination')
+		if page_nav is not None:
+			for page in page_nav.css('li'):
+				anchor = page.css_first('a')
+				if anchor is not None:
+					page_links.append(anchor.attributes.get('href'))
+
+	else:
+		try:
+			tree = lxml.html.fromstring(markup, parser=_HTML_PARSER)
+		except lxml.etree.ParserError:
+			# Empty page
+			return (rows, page_links)
+
+		# Only the rows with two cells are results, so let XPath filter the rows
+		for row in tree.xpath('//tr[count(.//td)=2]'):
+			(genus_cell, name_cell) = row.findall('.//td')
+			anchor = name_cell.find('.//a')
+			rows.append((genus_cell.text_content(), name_cell.text_content(), anchor.get('href') if anchor is not None else None))
+
+		page_nav = tree.xpath('//div[contains(concat(" ", normalize-space(@class), " "), " pagination ")]')
+		if len(page_nav) > 0:
+			for page in page_nav[0].iter('li'):
+				anchor = page.find('.//a')
+				if anchor is not None:
+					page_links.append(anchor.get('href'))
+
+	return (rows, page_links)
+
+
 def testModuleSearch(database='./RHS.db', verbose=False):
 	"""A simple test to check that all functions are working correctly.
 	Uses a known registered and valid grex."""
@@ -2,17 +2,55 @@
 
 """Module containing common functions used by multiple components of the nga package."""
 
+import json
 from sys import stdout, stderr
+from time import monotonic
+try:
+	import orjson
+	ORJSON_EXISTS = True
+except ImportError:
+	ORJSON_EXISTS = False
 
-def stdoutWF(content, min_verbosity=1, verbosity=1):
-	'''Write to stdout and immediately flush.'''
+PROGRESS_INTERVAL = 0.1 # Minimum time (in seconds) between progress updates
+
+def stdoutWF(content, min_verbosity=1, verbosity=1, args=None):
+	'''Write to stdout and immediately flush.
+	If args are supplied, content is a str.format() template that is only formatted when it is written.'''
 
 	if verbosity >= min_verbosity:
-		stdout.write(content)
+		stdout.write(content.format(*args) if args else content)
 		stdout.flush()
 
+def stdoutProgress(content, last_update=0.0, min_verbosity=1, verbosity=1, args=None):
+	'''Write a progress update to stdout, unless one was written within the last PROGRESS_INTERVAL seconds.
+	Returns the time of the last update, which should be passed to the next call.
+	As with stdoutWF, content can be a template to be formatted with args, so that skipped updates aren't formatted.'''
+
+	now = monotonic()
+	if now - last_update < PROGRESS_INTERVAL:
+		return last_update
+
+	stdoutWF(content, min_verbosity, verbosity, args)
+	return now
+
 def stderrWF(content):
 	'''Write to stderr and immediately flush.'''
 
 	stderr.write(content)
 	stderr.flush()
+
+def jsonLoads(content):
+	'''Decode a JSON document (str or bytes), using orjson if it is available.'''
+
+	if ORJSON_EXISTS:
+		return orjson.loads(content) # pylint: disable=no-member
+
+	return json.loads(content)
+
+def jsonDumpsBytes(obj):
+	'''Encode an object as UTF-8 JSON bytes (e.g. for a request body or a binary file), using orjson if it is available.'''
+
+	if ORJSON_EXISTS:
+		return orjson.dumps(obj) # pylint: disable=no-member
+
+	return json.dumps(obj).encode('utf-8')
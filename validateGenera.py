@@ -32,11 +32,24 @@ def checkGenera(dataframe):
 
 	print(dataframe[['Abbrev.','Genus','Composition','Taxonomical Status']])
 
-	# TODO:
-	# Exclude rows with empty composition, as we cannot sanity-check these
-	# All rows with '×' in the composition field are hybrids to sanity-check
-	# Create a reference dataframe view with just the non-hybrid genera and their taxonomic status
-	# Then iterate through the hybrid genera and lookup the corresponding components (iterrows or map function, perhaps? Need to investigate best way to do this.)
+	# All rows with '×' in the composition field are hybrids to sanity-check (rows with an empty composition cannot be checked)
+	hybrid_mask = dataframe['Composition'].str.contains('×', na=False, regex=False)
+	hybrids = dataframe.loc[hybrid_mask]
+
+	# Reference view with just the non-hybrid genera and their taxonomic status
+	reference = dataframe.loc[~hybrid_mask].drop_duplicates('Genus').set_index('Genus')['Taxonomical Status']
+
+	# Split each composition into one row per component genus and look up the components in a single join
+	components = hybrids['Composition'].str.split(r'\s*×\s*', regex=True).explode().str.strip()
+	components = components[components != '']
+	joined = components.to_frame('Component').join(reference, on='Component')
+
+	# Summarise the statuses of the components of each hybrid genus
+	component_status = joined['Taxonomical Status'].fillna('Not found').groupby(level=0).agg(lambda statuses: ', '.join(sorted(set(statuses))))
+	results = hybrids[['Abbrev.','Genus','Composition','Taxonomical Status']].assign(**{'Component Status': component_status})
+	print(results)
+
+	return results
 
 if __name__ == '__main__':
 	args = initParser()
@@ -46,6 +59,6 @@ if __name__ == '__main__':
 		print(f'{args.filename} not found')
 		sys.exit(1)
 
-	# Read the source XLSX
-	df = pd.read_excel(args.filename, sheet_name='Genera')
+	# Read the source XLSX (only the columns that are checked)
+	df = pd.read_excel(args.filename, sheet_name='Genera', engine='openpyxl', usecols=['Abbrev.','Genus','Composition','Taxonomical Status'])
 	checkGenera(df)